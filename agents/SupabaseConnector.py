@@ -1,14 +1,188 @@
 # streamlit_app.py
+import io
 import os
+import re
 import traceback
 import streamlit as st
 from dotenv import load_dotenv
 import psycopg2
+import psycopg2.extras
+from psycopg2 import sql
 from google import genai
+from google.genai import types
+try:
+    from utils.llm_cache import cached_text
+except ImportError:  # run outside the AgentX repo root: no response cache
+    def cached_text(model, prompt, generate, config=None, **_):
+        return generate()
+
+GEMINI_MODEL = "gemini-2.5-flash"
+# Deterministic, bounded code generation (also keeps the response cache hit rate high)
+CODEGEN_MAX_OUTPUT_TOKENS = 1024
+CODEGEN_TEMPERATURE = 0.0
+CODEGEN_CACHE_TTL_SECONDS = 3600  # how long generated code is reused for an identical request
+
+# Static part of the code-generation prompt, identical across requests. At ~450 tokens it is
+# below Gemini's minimum size for explicit context caching, so it is simply sent with each request.
+SCHEMA_PROMPT = """
+You are an assistant that writes Python code to perform the requested database operation using psycopg2.
+
+Table: public.courses              Column: course_id            Type: integer
+Table: public.courses              Column: course_name          Type: character varying
+Table: public.courses              Column: credits              Type: integer
+Table: public.courses              Column: department           Type: character varying
+Table: public.students             Column: student_id           Type: integer
+Table: public.students             Column: first_name           Type: character varying
+Table: public.students             Column: last_name            Type: character varying
+Table: public.students             Column: enrollment_year      Type: integer
+
+REQUIREMENTS:
+- Assume an existing psycopg2 connection 'connection' and cursor 'cursor' are provided.
+- Use parameterized queries where applicable (avoid string concatenation with user input).
+- For inserting more than one row, use `psycopg2.extras.execute_values(cursor, sql, rows)`, not `cursor.executemany`.
+- For loading more than 1000 rows, use `cursor.copy_expert("COPY ... FROM STDIN WITH CSV", io.StringIO(buf))`.
+- If the operation reads rows, fetch them and store in a variable named 'result' (a list of tuples).
+- If the operation modifies data (INSERT/UPDATE/DELETE/DDL), execute it; call 'connection.commit()' and set 'result' to a short string summary like "rows_affected=<n>" (when available).
+- Do NOT import new libraries; just use 'connection', 'cursor', 'psycopg2', 'psycopg2.extras' and 'io' already provided.
+- Do NOT close the connection or cursor.
+- Return ONLY the Python code, no explanations.
+
+"""
 
 st.set_page_config(page_title="AI + Supabase (psycopg2)", page_icon="🧠", layout="centered")
 st.title("🧠🔗 AI-Powered Supabase Ops (psycopg2)")
 
+# -------------------------------
+#  CACHED RESOURCES
+#  Streamlit reruns this script on every widget change; keep the Gemini client
+#  alive across reruns instead of rebuilding it. The DB connection is kept per
+#  session in st.session_state (psycopg2 connections must not be shared).
+# -------------------------------
+@st.cache_resource(show_spinner=False)
+def load_env() -> bool:
+    """Read .env once per process instead of on every rerun."""
+    load_dotenv(override=False)
+    return True
+
+
+@st.cache_resource(show_spinner=False)
+def get_genai_client(api_key: str):
+    return genai.Client(api_key=api_key)
+
+
+def get_db_connection(user: str, host: str, port: str, dbname: str, password: str):
+    """
+    Return this session's (connection, cursor), reusing the open connection across reruns
+    when the connection parameters are unchanged; otherwise close it and connect again.
+    """
+    params = (user, host, port, dbname, password)
+    connection = st.session_state.get("connection")
+    if connection is not None and not connection.closed and st.session_state.get("db_params") == params:
+        return connection, st.session_state["cursor"]
+    if connection is not None and not connection.closed:
+        connection.close()
+    connection = psycopg2.connect(
+        user=user,
+        password=password,
+        host=host,
+        port=port,
+        dbname=dbname
+    )
+    st.session_state["db_params"] = params
+    return connection, connection.cursor()
+
+
+def generate_operation_code(client, request_prompt: str, refresh: bool = False) -> str:
+    """
+    Generate psycopg2 code for the user's request. Code that does not compile is never cached;
+    refresh=True asks the model again instead of returning the cached code.
+    """
+    prompt = SCHEMA_PROMPT + request_prompt
+    config = types.GenerateContentConfig(
+        max_output_tokens=CODEGEN_MAX_OUTPUT_TOKENS,
+        temperature=CODEGEN_TEMPERATURE,
+        # thinking tokens count against max_output_tokens on gemini-2.5-flash
+        thinking_config=types.ThinkingConfig(thinking_budget=0),
+    )
+
+    def generate() -> str:
+        response = client.models.generate_content(
+            model=GEMINI_MODEL,
+            contents=prompt,
+            config=config,
+        )
+        text = response.text or ""
+        code_lines = text.strip().splitlines()
+        if len(code_lines) <= 2:
+            raise ValueError("Generated code is too short to skip first and last lines.")
+        # same slice that is executed below (drops the opening and closing fence lines)
+        compile("\n".join(code_lines[1:-1]), "<generated>", "exec")
+        return text
+
+    return cached_text(GEMINI_MODEL, prompt, generate, expire=CODEGEN_CACHE_TTL_SECONDS, refresh=refresh)
+
+
+# -------------------------------
+#  CANNED SQL INTENTS
+#  Common read-only requests are answered with fixed parameterized SQL,
+#  skipping the Gemini round-trip entirely. Anything else goes to Gemini.
+# -------------------------------
+DEFAULT_ROW_LIMIT = 10
+_TABLE = r"([A-Za-z_]\w*(?:\.[A-Za-z_]\w*)?)"  # table or schema.table
+
+
+def _table_identifier(name: str):
+    return sql.Identifier(*name.split("."))
+
+
+def _select_rows(match, cursor):
+    wants_all, limit, table = match.groups()
+    if limit is not None:
+        limit = int(limit)
+    elif not wants_all:
+        limit = DEFAULT_ROW_LIMIT
+    # LIMIT NULL means no limit in PostgreSQL
+    cursor.execute(sql.SQL("SELECT * FROM {} LIMIT %s").format(_table_identifier(table)), (limit,))
+    return cursor.fetchall()
+
+
+def _count_rows(match, cursor):
+    cursor.execute(sql.SQL("SELECT COUNT(*) FROM {}").format(_table_identifier(match.group(1))))
+    return cursor.fetchall()
+
+
+INTENTS = [
+    # "list/fetch/show/get [all] [first|top] [N] rows from|of|in <table>"
+    (re.compile(r"^\s*(?:list|fetch|show|get)\s+(all\s+)?(?:the\s+)?(?:(?:first|top)\s+)?(\d+)?\s*rows?\s+(?:from|of|in)\s+" + _TABLE + r"\s*;?\s*$", re.I), _select_rows),
+    # "count [all|the] rows from|of|in <table>"
+    (re.compile(r"^\s*count\s+(?:(?:all|the)\s+)?rows?\s+(?:from|of|in)\s+" + _TABLE + r"\s*;?\s*$", re.I), _count_rows),
+]
+
+
+def match_intent(request: str):
+    """Return (handler, match) for the first canned intent matching the request, else None."""
+    for pattern, handler in INTENTS:
+        match = pattern.match(request)
+        if match:
+            return handler, match
+    return None
+
+
+def show_result(result):
+    """Render the 'result' of an executed operation."""
+    if isinstance(result, list):
+        # likely SELECT rows
+        if len(result) == 0:
+            st.info("Query returned 0 rows.")
+        else:
+            st.success(f"Returned {len(result)} row(s).")
+            st.dataframe(result)
+    else:
+        st.write(result if result is not None else "No 'result' variable returned.")
+
+
+load_env()
+
 # -------------------------------
 #  1) GEMINI API KEY INPUT
 # -------------------------------
@@ -23,7 +197,7 @@ with st.expander("1) Enter your Gemini API key", expanded=True):
 client = None
 if st.session_state.get("gemini_api_key"):
     try:
-        client = genai.Client(api_key=st.session_state["gemini_api_key"])
+        client = get_genai_client(st.session_state["gemini_api_key"])
         st.success("Gemini client configured.")
     except Exception as e:
         st.error(f"Failed to init Gemini: {e}")
@@ -34,20 +208,18 @@ if st.session_state.get("gemini_api_key"):
 # -------------------------------
 with st.expander("2) Database connection (from environment variables)", expanded=True):
     st.caption("The app loads a .env automatically if present. You can also override below.")
-    load_dotenv(override=False)
 
-    # Show current env-derived values (masked where sensible)
-    def envval(name, default=""):
-        return os.getenv(name, default)
+    # Show current env-derived values (masked where sensible), read once per rerun
+    env = {name: os.getenv(name, "") for name in ("user", "host", "dbname", "port", "password")}
 
     col1, col2 = st.columns(2)
     with col1:
-        user_env = st.text_input("USER (env: user)", value=envval("user", ""), key="db_user")
-        host_env = st.text_input("HOST (env: host)", value=envval("host", ""), key="db_host")
-        db_env   = st.text_input("DBNAME (env: dbname)", value=envval("dbname", ""), key="db_name")
+        user_env = st.text_input("USER (env: user)", value=env["user"], key="db_user")
+        host_env = st.text_input("HOST (env: host)", value=env["host"], key="db_host")
+        db_env   = st.text_input("DBNAME (env: dbname)", value=env["dbname"], key="db_name")
     with col2:
-        port_env = st.text_input("PORT (env: port)", value=envval("port", ""), key="db_port")
-        pw_env   = st.text_input("PASSWORD (env: password)", value=envval("password", ""), key="db_pass", type="password")
+        port_env = st.text_input("PORT (env: port)", value=env["port"], key="db_port")
+        pw_env   = st.text_input("PASSWORD (env: password)", value=env["password"], key="db_pass", type="password")
 
     # Optionally push overrides into os.environ for this session
     if st.checkbox("Override environment with the values above"):
@@ -69,14 +241,7 @@ with st.expander("2) Database connection (from environment variables)", expanded
             if not all([USER, PASSWORD, HOST, PORT, DBNAME]):
                 st.error("Missing one or more required env vars: user, password, host, port, dbname.")
             else:
-                connection = psycopg2.connect(
-                    user=USER,
-                    password=PASSWORD,
-                    host=HOST,
-                    port=PORT,
-                    dbname=DBNAME
-                )
-                cursor = connection.cursor()
+                connection, cursor = get_db_connection(USER, HOST, PORT, DBNAME, PASSWORD)
                 st.session_state["connection"] = connection
                 st.session_state["cursor"] = cursor
                 st.success("Connection successful!")
@@ -87,97 +252,83 @@ with st.expander("2) Database connection (from environment variables)", expanded
 # -------------------------------
 #  3) PROMPT → CODE → EXECUTE
 # -------------------------------
-with st.expander("3) Describe the operation you want to do", expanded=True):
-    st.caption("Example: 'Create a table students(id serial primary key, name text) and insert two rows', or 'List all rows from public.students'")
-    op = st.text_area("Your request", height=120, placeholder="e.g., 'Fetch first 5 rows from public.courses'")
-
-    # Safety confirmation (recommended when executing generated code)
-    acknowledge = st.checkbox("I understand this will execute model-generated code against my database.")
-
-    run = st.button("Generate & Run")
-    if run:
-        if client is None:
-            st.error("Please enter a valid Gemini API key first.")
-        elif "connection" not in st.session_state or "cursor" not in st.session_state:
-            st.error("Please connect to the database first.")
-        elif not acknowledge:
-            st.warning("Please confirm the safety checkbox before executing.")
-        elif not op.strip():
-            st.warning("Please enter an operation.")
-        else:
-            # Build a precise prompt for safe psycopg2 usage
-            gemini_prompt = f"""
-You are an assistant that writes Python code to perform the requested database operation using psycopg2.
-
-Table: public.courses              Column: course_id            Type: integer
-Table: public.courses              Column: course_name          Type: character varying
-Table: public.courses              Column: credits              Type: integer
-Table: public.courses              Column: department           Type: character varying
-Table: public.students             Column: student_id           Type: integer
-Table: public.students             Column: first_name           Type: character varying
-Table: public.students             Column: last_name            Type: character varying
-Table: public.students             Column: enrollment_year      Type: integer
+@st.fragment
+def operation_section():
+    """Section 3 as a fragment: editing the request or clicking Generate & Run reruns only this block."""
+    with st.expander("3) Describe the operation you want to do", expanded=True):
+        st.caption("Example: 'Create a table students(id serial primary key, name text) and insert two rows', or 'List all rows from public.students'")
+        op = st.text_area("Your request", height=120, placeholder="e.g., 'Fetch first 5 rows from public.courses'")
 
-REQUIREMENTS:
-- Assume an existing psycopg2 connection 'connection' and cursor 'cursor' are provided.
-- Use parameterized queries where applicable (avoid string concatenation with user input).
-- If the operation reads rows, fetch them and store in a variable named 'result' (a list of tuples).
-- If the operation modifies data (INSERT/UPDATE/DELETE/DDL), execute it; call 'connection.commit()' and set 'result' to a short string summary like "rows_affected=<n>" (when available).
-- Do NOT import new libraries; just use 'connection' and 'cursor' already provided.
-- Do NOT close the connection or cursor.
-- Return ONLY the Python code, no explanations.
+        # Safety confirmation (recommended when executing generated code)
+        acknowledge = st.checkbox("I understand this will execute model-generated code against my database.")
 
-The user's request:
+        run = st.button("Generate & Run")
+        if run:
+            intent = match_intent(op)
+            if "connection" not in st.session_state or "cursor" not in st.session_state:
+                st.error("Please connect to the database first.")
+            elif not acknowledge:
+                st.warning("Please confirm the safety checkbox before executing.")
+            elif not op.strip():
+                st.warning("Please enter an operation.")
+            elif intent is not None:
+                handler, match = intent
+                st.subheader("Execution result")
+                try:
+                    show_result(handler(match, st.session_state["cursor"]))
+                except Exception:
+                    # leave the connection usable after a failed statement
+                    st.session_state["connection"].rollback()
+                    st.error("Error while executing query:")
+                    st.code(traceback.format_exc())
+            elif client is None:
+                st.error("Please enter a valid Gemini API key first.")
+            else:
+                # Build a precise prompt for safe psycopg2 usage (static schema prefix + the user's request)
+                request_prompt = f"""The user's request:
 \"\"\"{op.strip()}\"\"\"
 """
 
-            try:
-                with st.spinner("Generating code with Gemini..."):
-                    response = client.models.generate_content(
-                        model="gemini-2.5-flash",
-                        contents=gemini_prompt
-                    )
-                    code = (response.text or "").strip()
-
-                if not code:
-                    st.error("Model did not return code.")
-                else:
-                    # st.subheader("Generated code")
-                    # st.code(code, language="python")
-
-                    # Prepare safe execution environment
-                    safe_globals = {
-                        "connection": st.session_state["connection"],
-                        "cursor": st.session_state["cursor"],
-                        "psycopg2": psycopg2,  # handy for sql.Identifier if the model uses it
-                    }
-                    safe_locals = {}
-
-                    st.subheader("Execution result")
-                    try:
-                        code_lines = code.splitlines()
-                        if len(code_lines) > 2:
-                            exec("\n".join(code_lines[1:-1]) , safe_globals, safe_locals)
-                        else:
-                            st.error("Generated code is too short to skip first and last lines.")
-                        result = safe_locals.get("result", None)
-
-                        if isinstance(result, list):
-                            # likely SELECT rows
-                            if len(result) == 0:
-                                st.info("Query returned 0 rows.")
+                try:
+                    with st.spinner("Generating code with Gemini..."):
+                        # the cached code for this request failed last time: ask the model again
+                        refresh = st.session_state.pop("codegen_failed_request", None) == request_prompt
+                        code = generate_operation_code(client, request_prompt, refresh=refresh).strip()
+
+                    if not code:
+                        st.error("Model did not return code.")
+                    else:
+                        # st.subheader("Generated code")
+                        # st.code(code, language="python")
+
+                        # Prepare safe execution environment
+                        safe_globals = {
+                            "connection": st.session_state["connection"],
+                            "cursor": st.session_state["cursor"],
+                            "psycopg2": psycopg2,  # handy for sql.Identifier if the model uses it
+                            "io": io,  # StringIO buffers for copy_expert bulk loads
+                        }
+                        safe_locals = {}
+
+                        st.subheader("Execution result")
+                        try:
+                            code_lines = code.splitlines()
+                            if len(code_lines) > 2:
+                                exec("\n".join(code_lines[1:-1]) , safe_globals, safe_locals)
                             else:
-                                st.success(f"Returned {len(result)} row(s).")
-                                st.dataframe(result)
-                        else:
-                            st.write(result if result is not None else "No 'result' variable returned.")
-                    except Exception as run_err:
-                        st.error("Error while executing generated code:")
-                        st.code(traceback.format_exc())
+                                st.error("Generated code is too short to skip first and last lines.")
+                            show_result(safe_locals.get("result", None))
+                        except Exception as run_err:
+                            st.session_state["codegen_failed_request"] = request_prompt
+                            st.error("Error while executing generated code:")
+                            st.code(traceback.format_exc())
 
-            except Exception as e:
-                st.error(f"Failed to generate code: {e}")
-                st.code(traceback.format_exc())
+                except Exception as e:
+                    st.error(f"Failed to generate code: {e}")
+                    st.code(traceback.format_exc())
+
+
+operation_section()
 
 # -------------------------------
 #  4) OPTIONAL: CLOSE CONNECTION
@@ -190,6 +341,7 @@ with st.expander("4) Manage session"):
                 st.session_state["connection"].close()
                 del st.session_state["cursor"]
                 del st.session_state["connection"]
+                st.session_state.pop("db_params", None)
                 st.success("Connection closed.")
             except Exception as e:
                 st.error(f"Error closing connection: {e}")
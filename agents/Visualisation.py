@@ -4,12 +4,39 @@ import io
 import pandas as pd
 import numpy as np
 import matplotlib
+matplotlib.use("Agg")  # headless backend; skips GUI backend probing
 import matplotlib.pyplot as plt
 import seaborn as sns
 import matplotlib.patches as patches
 import textwrap
+import re
+import builtins
+import operator
+from types import ModuleType
 from typing import Optional
 
+try:
+    from RestrictedPython import compile_restricted, safe_builtins, limited_builtins
+    from RestrictedPython.Eval import default_guarded_getitem, default_guarded_getiter
+    from RestrictedPython.Guards import (
+        guarded_iter_unpack_sequence,
+        guarded_unpack_sequence,
+        safer_getattr,
+    )
+    from RestrictedPython.PrintCollector import PrintCollector
+except ImportError:  # RestrictedPython not installed: generated code runs with regular builtins
+    compile_restricted = None
+
+# Optional vectorized engines for aggregations in generated code
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
 # --- Replace this with your configured client object (e.g. OpenAI/Google client) ---
 # The snippet assumes you already have `client` available and authenticated, as in your example.
 # Example placeholder:
@@ -17,10 +44,19 @@ from typing import Optional
 # client = Client(api_key="YOUR_KEY")
 # -------------------------------------------------------------------------------
 from google import genai
+try:
+    from utils.llm_cache import cached_generate
+except ImportError:  # run outside the AgentX repo root: no response cache
+    def cached_generate(client, model, prompt, config=None, **_):
+        return client.models.generate_content(model=model, contents=prompt, config=config).text or ""
 client = genai.Client(api_key="")  # Add your API key
 
 st.set_page_config(page_title="LLM-driven Visualization App", layout="wide")
 
+PREVIEW_ROWS = 50  # rows of `df` sent to the browser for the preview table
+SUMMARY_MAX_CHARS = 2000  # cap on the describe() summary included in the prompt
+GENERATED_CODE_TTL_SECONDS = 3600  # how long generated plotting code is reused for an identical prompt
+
 st.title("CSV → DataFrame → LLM-generated Visualizations")
 
 st.markdown(
@@ -31,16 +67,33 @@ Two generate buttons: one for general visualizations (matplotlib + seaborn), one
 """
 )
 
+if compile_restricted is None:
+    st.warning("RestrictedPython is not installed: generated code will run without a sandbox. "
+               "Install it with `pip install RestrictedPython`.")
+
 # --- File uploader and DataFrame creation ---
+@st.cache_data(show_spinner=False)
+def load_csv(csv_bytes: bytes) -> pd.DataFrame:
+    """
+    Parse uploaded CSV bytes into a DataFrame; cached so reruns with the
+    same upload skip re-parsing. Uses the multi-threaded pyarrow reader when
+    available.
+    """
+    try:
+        return pd.read_csv(io.BytesIO(csv_bytes), engine="pyarrow", dtype_backend="pyarrow")
+    except Exception:
+        # pyarrow missing (or pandas < 2.0): fall back to the default C engine
+        return pd.read_csv(io.BytesIO(csv_bytes))
+
 uploaded_file = st.file_uploader("Upload CSV", type=["csv"], accept_multiple_files=False)
 
 df: Optional[pd.DataFrame] = None
 if uploaded_file is not None:
     try:
-        df = pd.read_csv(uploaded_file)
+        df = load_csv(uploaded_file.getvalue())
         st.success("CSV loaded into DataFrame `df`.")
-        st.write("Preview of `df`:")
-        st.dataframe(df)
+        st.write(f"Preview of `df` (first {PREVIEW_ROWS} of {len(df)} rows):")
+        st.dataframe(df.head(PREVIEW_ROWS), use_container_width=True)
     except Exception as e:
         st.error(f"Failed to read CSV: {e}")
 
@@ -51,37 +104,98 @@ st.markdown("---")
 col1, col2 = st.columns(2)
 
 # helper: extract code from fenced blocks or return as-is
+# first fenced block: opening fence line (any info string) up to the closing fence or end of text
+_CODE_FENCE_RE = re.compile(r"^[ \t]*```[^\n]*\n(.*?)(?:^[ \t]*```|\Z)", re.DOTALL | re.MULTILINE)
+
 def extract_code(text: str) -> str:
     """
-    Extract python code from triple-fenced blocks if present,
+    Extract python code from the first triple-fenced block if present,
     otherwise return the raw text.
     """
     if not text:
         return ""
-    lines = text.splitlines()
-    # detect a fence at start
-    if len(lines) >= 1 and lines[0].strip().startswith("```"):
-        inner = []
-        for line in lines[1:]:
-            if line.strip().startswith("```"):
-                break
-            inner.append(line)
-        return "\n".join(inner)
-    # try to find any fenced blocks in body
-    start = None
-    for i, line in enumerate(lines):
-        if line.strip().startswith("```"):
-            start = i
-            break
-    if start is not None:
-        inner = []
-        for line in lines[start+1:]:
-            if line.strip().startswith("```"):
-                break
-            inner.append(line)
-        return "\n".join(inner)
+    match = _CODE_FENCE_RE.search(text)
+    if match:
+        return match.group(1).rstrip("\n")
     return text
 
+# --- Restricted execution environment for generated code ---
+# Modules the generated code may import (top-level package names)
+ALLOWED_IMPORTS = {"matplotlib", "seaborn", "pandas", "numpy", "math", "duckdb", "polars"}
+# Modules whose functions must not be reachable through attribute chains on allowed modules
+# (e.g. matplotlib.os.system, pd.io.common.os)
+DENIED_MODULES = {"os", "posix", "nt", "subprocess", "sys", "shutil", "builtins", "io", "_io",
+                  "importlib", "ctypes", "socket", "pathlib", "runpy", "pickle"}
+LARGE_FRAME_ROWS = 10000  # above this, generated code is told to aggregate with DuckDB instead of pandas
+
+_INPLACE_OPS = {
+    "+=": operator.iadd, "-=": operator.isub, "*=": operator.imul, "/=": operator.itruediv,
+    "//=": operator.ifloordiv, "%=": operator.imod, "**=": operator.ipow, "@=": operator.imatmul,
+    "<<=": operator.ilshift, ">>=": operator.irshift, "&=": operator.iand, "|=": operator.ior,
+    "^=": operator.ixor,
+}
+
+def _guarded_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level != 0 or name.split(".")[0] not in ALLOWED_IMPORTS:
+        raise ImportError(f"Import of '{name}' is not allowed in generated code.")
+    return __import__(name, globals, locals, fromlist, level)
+
+def _guarded_getattr(obj, name, *default):
+    # safer_getattr only refuses '_' names; also refuse modules outside ALLOWED_IMPORTS and
+    # callables from DENIED_MODULES that allowed modules happen to expose as attributes
+    value = safer_getattr(obj, name, *default)
+    if isinstance(value, ModuleType):
+        if value.__name__.split(".")[0] not in ALLOWED_IMPORTS:
+            raise AttributeError(f"Access to module '{value.__name__}' is not allowed in generated code.")
+    elif callable(value):
+        module = getattr(value, "__module__", None)
+        if isinstance(module, str) and module.split(".")[0] in DENIED_MODULES:
+            raise AttributeError(f"Access to '{name}' ({module}) is not allowed in generated code.")
+    return value
+
+def _inplacevar(op, x, y):
+    return _INPLACE_OPS[op](x, y)
+
+def _write_guard(obj):
+    # item/attribute writes on ordinary objects (df["col"] = ..., plt.rcParams[...] = ...)
+    # are fine; only patching imported modules (e.g. pd.read_csv = ...) is blocked
+    if isinstance(obj, ModuleType):
+        raise TypeError(f"Generated code may not modify module '{obj.__name__}'.")
+    return obj
+
+def _apply(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+def restricted_globals() -> dict:
+    """
+    Builtins and RestrictedPython guard hooks for executing generated code.
+    Returns an empty dict when RestrictedPython is unavailable.
+    """
+    if compile_restricted is None:
+        return {}
+    restricted_builtins = {**safe_builtins, **limited_builtins, "__import__": _guarded_import}
+    for name in ("dict", "enumerate", "sum", "min", "max", "map", "filter", "any", "all", "reversed", "set"):
+        restricted_builtins[name] = getattr(builtins, name)
+    return {
+        "__builtins__": restricted_builtins,
+        "_getattr_": _guarded_getattr,
+        "_getitem_": default_guarded_getitem,
+        "_getiter_": default_guarded_getiter,
+        "_iter_unpack_sequence_": guarded_iter_unpack_sequence,
+        "_unpack_sequence_": guarded_unpack_sequence,
+        "_write_": _write_guard,
+        "_apply_": _apply,
+        "_inplacevar_": _inplacevar,
+        "_print_": PrintCollector,
+    }
+
+# helper: compile generated code once per distinct source (reused across reruns)
+@st.cache_resource(show_spinner=False)
+def compile_generated_code(code: str):
+    if compile_restricted is not None:
+        return compile_restricted(code, "<generated>", "exec")
+    return compile(code, "<generated>", "exec")
+
 # helper: run generated code with controlled globals
 def run_generated_code(code: str, df_local: Optional[pd.DataFrame]):
     """
@@ -93,6 +207,7 @@ def run_generated_code(code: str, df_local: Optional[pd.DataFrame]):
     code = textwrap.dedent(code)
     # prepare globals/locals for exec
     exec_globals = {
+        **restricted_globals(),
         "plt": plt,
         "sns": sns,
         "pd": pd,
@@ -101,10 +216,14 @@ def run_generated_code(code: str, df_local: Optional[pd.DataFrame]):
         # allow access to matplotlib if needed
         "matplotlib": matplotlib,
     }
+    if duckdb is not None:
+        exec_globals["duckdb"] = duckdb
+    if pl is not None:
+        exec_globals["pl"] = pl
     # place df in locals (so code can reference df)
     exec_locals = {"df": df_local}
     try:
-        exec(code, exec_globals, exec_locals)
+        exec(compile_generated_code(code), exec_globals, exec_locals)
     except Exception as e:
         return None, str(e), code
     # The generated code is expected to create 'fig' somehow (e.g. fig = plt.figure(...))
@@ -112,7 +231,12 @@ def run_generated_code(code: str, df_local: Optional[pd.DataFrame]):
     return fig, None, code
 
 # The two button actions (visualization, workflow diagram)
-with col1:
+@st.fragment
+def visualization_section(prompt: str, df: Optional[pd.DataFrame]):
+    """
+    Generation block as a fragment: clicking the button reruns only this block,
+    not the CSV upload/preview above it.
+    """
     if st.button("Generate Visualization (matplotlib + seaborn)", use_container_width=True):
         if not prompt:
             st.error("Please enter a prompt.")
@@ -122,31 +246,40 @@ with col1:
             st.info("Requesting generated code from model...")
             # Build prompt as in your snippet
             cols = df.columns.tolist()
+            summary = str(df.describe(include="all").to_dict())[:SUMMARY_MAX_CHARS]
+            aggregation_hint = (
+                "- For any aggregation over `df`, use `duckdb.query('SELECT ... FROM df GROUP BY ...').df()` "
+                f"and plot the reduced result. Do not call `df.groupby` on frames with more than {LARGE_FRAME_ROWS} rows."
+                if duckdb is not None else ""
+            )
             gemini_prompt = f"""Write Python code using matplotlib.pyplot and seaborn to create the plot described by the user prompt below.
             - Use only the provided pandas DataFrame named `df`. Do NOT create new DataFrames or synthetic/random data.
             - The code must create a matplotlib.figure named `fig` (e.g. `fig, ax = plt.subplots()`).
             - Do not include display or save calls (no plt.show(), fig.savefig()).
             - If a referenced column does not exist in `df`, raise an Exception.
+            {aggregation_hint}
 
             User prompt:
             \"\"\"{prompt}\"\"\"
 
             DataFrame columns: {cols}
             DataFrame dtypes: {df.dtypes.to_dict()}
+            DataFrame summary statistics (truncated): {summary}
 
             Return only the Python code block (no extra text)."""
 
             try:
                 # Replace with your client call. Example per your snippet:
-                response = client.models.generate_content(
-                    model="gemini-2.5-flash",
-                    contents=gemini_prompt,
-                )
-                # try to extract text attribute safely
-                code_text = getattr(response, "text", None) or getattr(response, "output", None) or str(response)
+                # identical prompts are answered from the on-disk LLM cache, unless the cached
+                # code for this prompt failed last time: then ask the model again
+                refresh = st.session_state.pop("viz_failed_prompt", None) == gemini_prompt
+                code_text = cached_generate(client, "gemini-2.5-flash", gemini_prompt,
+                                            expire=GENERATED_CODE_TTL_SECONDS, refresh=refresh)
                 code = extract_code(code_text)
                 st.code(code, language="python")
                 fig, err, executed_code = run_generated_code(code, df)
+                if err or fig is None:
+                    st.session_state["viz_failed_prompt"] = gemini_prompt
                 if err:
                     st.error(f"Error executing generated code: {err}")
                     st.subheader("Generated code (for debugging)")
@@ -157,20 +290,24 @@ with col1:
                     st.code(executed_code, language="python")
                 else:
                     st.success("Visualization generated.")
-                    # Display with st.pyplot for matplotlib Figure
+                    # Render to a PNG buffer and close the figure so pyplot's
+                    # figure manager doesn't keep every generated figure alive
+                    buf = io.BytesIO()
                     try:
-                        st.pyplot(fig)
-                    except Exception:
-                        # fallback: save to buffer and display image
-                        buf = io.BytesIO()
-                        fig.savefig(buf, format="png", bbox_inches="tight")
-                        buf.seek(0)
-                        st.image(buf)
+                        fig.savefig(buf, format="png", dpi=100, bbox_inches="tight")
+                    finally:
+                        plt.close(fig)
+                    buf.seek(0)
+                    st.image(buf)
             except Exception as e:
                 st.error(f"Error calling model: {e}")
 
+with col1:
+    visualization_section(prompt, df)
+
 st.markdown("---")
 st.caption(
-    "Execution environment exposes: `df` (the uploaded DataFrame), `pd`, `np`, `plt`, `sns`, `patches`, and `matplotlib`.\n"
+    "Execution environment exposes: `df` (the uploaded DataFrame), `pd`, `np`, `plt`, `sns`, `patches`, and `matplotlib` "
+    "(plus `duckdb` and `pl` when installed).\n"
     "Generated code MUST create a matplotlib.figure object named `fig` (e.g. `fig = plt.figure()` or `fig, ax = plt.subplots()`)."
 )
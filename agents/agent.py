@@ -1,15 +1,70 @@
+import hashlib
 import streamlit as st
 import google.generativeai as genai
 
 # --- Streamlit App Configuration ---
 st.set_page_config(
-    page_title="Text Sentiment Analyzer with Gemini",
+    page_title="Text Sentiment Analyzer",
     layout="centered",
     initial_sidebar_state="auto"
 )
 
-st.title("✨ Gemini-Powered Sentiment Analyzer")
-st.markdown("Analyze the sentiment (Positive, Negative, or Neutral) of your text using Google's `gemini-2.5-flash` AI model.")
+# --- Local Sentiment Model ---
+SENTIMENT_MODEL = "cardiffnlp/twitter-roberta-base-sentiment-latest"
+
+@st.cache_resource(show_spinner=False)
+def _load_pipeline():
+    # Raises on failure, so st.cache_resource only ever keeps a loaded model
+    from transformers import pipeline
+    return pipeline("sentiment-analysis", model=SENTIMENT_MODEL)
+
+def load_sentiment_classifier():
+    """
+    Load a small on-device 3-class sentiment model once per process.
+    Returns None if `transformers` is not installed or the model cannot be loaded
+    (no network, missing torch, ...), in which case Gemini is used instead.
+    Failures are not cached: the next analysis tries to load the model again.
+    """
+    try:
+        return _load_pipeline()
+    except Exception:
+        return None
+
+# --- Gemini Client ---
+@st.cache_resource(show_spinner=False)
+def get_gemini_client(key_sha: str, _api_key: str):
+    """
+    Configure genai and build the client once per API key instead of on every click.
+    Cached on the key's hash; the leading underscore keeps the raw key out of the cache key.
+    """
+    # In the `google-generativeai` library, `genai.Client(api_key=...)` is achieved by:
+    # 1. Configuring the API key globally.
+    genai.configure(api_key=_api_key)
+    # 2. Obtaining a client object that has the `models` attribute for content generation.
+    return genai.get_client()
+
+def show_sentiment(sentiment_raw: str) -> bool:
+    """
+    Display the sentiment label. Returns False if it is not Positive, Negative, or Neutral.
+    """
+    sentiment = sentiment_raw.upper() # Standardize to uppercase for reliable comparison
+
+    st.subheader("Results:")
+    if "POSITIVE" in sentiment:
+        st.success(f"**Sentiment: Positive** 😃")
+    elif "NEGATIVE" in sentiment:
+        st.error(f"**Sentiment: Negative** 😠")
+    elif "NEUTRAL" in sentiment:
+        st.info(f"**Sentiment: Neutral** 😐")
+    else:
+        return False
+    return True
+
+st.title("✨ Sentiment Analyzer")
+st.markdown(
+    f"Analyze the sentiment (Positive, Negative, or Neutral) of your text with the on-device `{SENTIMENT_MODEL}` model, "
+    "falling back to Google's `gemini-2.5-flash` AI model when the local model is unavailable."
+)
 st.markdown("---")
 
 # --- Gemini API Key Input ---
@@ -17,7 +72,7 @@ st.markdown("---")
 USER_GEMINI_KEY = st.text_input(
     "🔑 Enter your Gemini API Key",
     type="password", # Mask the input for security
-    help="You can obtain a Gemini API key from Google AI Studio: [https://aistudio.google.com/app/apikey](https://aistudio.google.com/app/apikey)"
+    help="Only needed when the local sentiment model is unavailable. You can obtain a Gemini API key from Google AI Studio: [https://aistudio.google.com/app/apikey](https://aistudio.google.com/app/apikey)"
 )
 
 st.markdown("---")
@@ -34,19 +89,24 @@ st.markdown("---")
 
 # --- Sentiment Analysis Button and Logic ---
 if st.button("Analyze Sentiment", use_container_width=True, type="primary"):
-    if not USER_GEMINI_KEY:
-        st.error("🚨 Please enter your Gemini API Key to proceed with the analysis.")
-    elif not user_text:
+    # Raw response of the previous analysis (kept only when it needs debugging)
+    st.session_state.pop("raw_gemini_response", None)
+    with st.spinner("📦 Loading sentiment model..."):
+        sentiment_classifier = load_sentiment_classifier()
+    if not user_text:
         st.warning("⚠️ Please enter some text in the text area to analyze its sentiment.")
+    elif sentiment_classifier is not None:
+        # Fixed three-way label: a local model answers in milliseconds with no API round-trip.
+        with st.spinner("🚀 Analyzing sentiment locally..."):
+            label = sentiment_classifier(user_text, truncation=True)[0]["label"]
+        show_sentiment(label)
+    elif not USER_GEMINI_KEY:
+        st.error("🚨 Please enter your Gemini API Key to proceed with the analysis.")
     else:
         try:
-            # Configure the genai client with the user-supplied API key.
+            # Get the genai client for the user-supplied API key.
             # As per the example: client = genai.Client(api_key=user_supplied_key)
-            # In the `google-generativeai` library, this pattern is achieved by:
-            # 1. Configuring the API key globally.
-            genai.configure(api_key=USER_GEMINI_KEY)
-            # 2. Obtaining a client object that has the `models` attribute for content generation.
-            client = genai.get_client() 
+            client = get_gemini_client(hashlib.sha256(USER_GEMINI_KEY.encode()).hexdigest(), USER_GEMINI_KEY)
 
             # Define the prompt for sentiment analysis.
             # We instruct the model to provide a very specific, single-word output
@@ -65,7 +125,13 @@ if st.button("Analyze Sentiment", use_container_width=True, type="primary"):
             with st.spinner("🚀 Analyzing sentiment using Gemini..."):
                 response = client.models.generate_content(
                     model="gemini-2.5-flash", # Using the model specified in requirements
-                    contents=[prompt]
+                    contents=[prompt],
+                    # One-word answer: cap output hard, answer deterministically, skip thinking
+                    config={
+                        "max_output_tokens": 8,
+                        "temperature": 0.0,
+                        "thinking_config": {"thinking_budget": 0},
+                    },
                 )
 
             # --- Extract and Display Sentiment ---
@@ -73,26 +139,16 @@ if st.button("Analyze Sentiment", use_container_width=True, type="primary"):
                 # Get the first part of the content from the first candidate.
                 # The model's response should be just "Positive", "Negative", or "Neutral".
                 sentiment_raw = response.candidates[0].content.parts[0].text.strip()
-                sentiment = sentiment_raw.upper() # Standardize to uppercase for reliable comparison
-
-                st.subheader("Results:")
-                if "POSITIVE" in sentiment:
-                    st.success(f"**Sentiment: Positive** 😃")
-                elif "NEGATIVE" in sentiment:
-                    st.error(f"**Sentiment: Negative** 😠")
-                elif "NEUTRAL" in sentiment:
-                    st.info(f"**Sentiment: Neutral** 😐")
-                else:
+
+                if not show_sentiment(sentiment_raw):
                     st.warning(f"🤔 Could not determine a clear sentiment. Gemini's response was: '{sentiment_raw}'.")
-                    # Optional: Show full raw response for debugging purposes if the output wasn't as expected.
-                    with st.expander("Show full Gemini API response"):
-                        st.json(response.to_dict())
+                    # Optional: keep the full raw response for debugging purposes if the output wasn't as expected.
+                    st.session_state["raw_gemini_response"] = response
             else:
                 st.error("❌ No valid response received from the Gemini model. It might have refused to generate content based on safety policies or other issues.")
                 # If there's a response object but no candidates, it might contain error information.
                 if response:
-                    with st.expander("Show raw API response (if available)"):
-                        st.json(response.to_dict())
+                    st.session_state["raw_gemini_response"] = response
 
         except Exception as e:
             st.error(f"❌ An error occurred during analysis: {e}")
@@ -101,5 +157,11 @@ if st.button("Analyze Sentiment", use_container_width=True, type="primary"):
             st.markdown("- **Network connectivity** issues.")
             st.markdown("- The **content of your text** might violate Gemini's safety policies, causing the model to block a response.")
 
+# Serializing the full response walks every candidate and safety rating,
+# so only do it when the user actually asks to see it.
+if st.session_state.get("raw_gemini_response") is not None:
+    if st.checkbox("Show raw Gemini API response"):
+        st.json(st.session_state["raw_gemini_response"].to_dict())
+
 st.markdown("---")
-st.caption("Built with Streamlit and Google Gemini API.")
\ No newline at end of file
+st.caption("Built with Streamlit, Hugging Face Transformers and Google Gemini API.")
\ No newline at end of file
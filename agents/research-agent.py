@@ -1,14 +1,50 @@
 import streamlit as st
 import google.generativeai as genai
 import requests
+from requests.adapters import HTTPAdapter
 import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+try:
+    from utils.llm_cache import cached_text
+except ImportError:  # run outside the AgentX repo root: no response cache
+    def cached_text(model, prompt, generate, config=None, **_):
+        return generate()
 
 # --- Constants ---
 SEMANTIC_SCHOLAR_API_URL = "https://api.semanticscholar.org/graph/v1/paper/search"
 MAX_PAPERS_TO_SUMMARIZE = 3  # Limit the number of papers to process to avoid excessive API calls/time
+GEMINI_MODEL = "gemini-2.5-flash"
+SUMMARY_MAX_OUTPUT_TOKENS = 200  # a 3-4 sentence summary
+# gemini-2.5-flash counts thinking tokens against max_output_tokens and this SDK cannot turn thinking off
+THINKING_TOKEN_HEADROOM = 1024
+SUMMARY_TEMPERATURE = 0.2
 
 # --- Helper Functions ---
 
+@st.cache_resource(show_spinner=False)
+def get_gemini_model(api_key: str):
+    """
+    Returns a Gemini model configured with the given API key, built once and reused across reruns.
+    """
+    genai.configure(api_key=api_key)
+    # Using gemini-1.5-flash as it's good for summarization and cost-effective
+    return genai.GenerativeModel(GEMINI_MODEL)
+
+@st.cache_resource(show_spinner=False)
+def get_http_session():
+    """
+    Returns a pooled HTTP session shared across reruns, so repeated searches reuse the TLS connection.
+    """
+    session = requests.Session()
+    session.headers.update({
+        # It's good practice to identify your application in the User-Agent header
+        "User-Agent": "StreamlitGeminiPaperSummarizer/1.0 (contact@example.com)"
+    })
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8)
+    session.mount("https://", adapter)
+    return session
+
 def search_semantic_scholar(query: str, limit: int = MAX_PAPERS_TO_SUMMARIZE):
     """
     Searches Semantic Scholar for research papers based on a query.
@@ -19,42 +55,29 @@ def search_semantic_scholar(query: str, limit: int = MAX_PAPERS_TO_SUMMARIZE):
         "fields": "title,abstract,url,authors",  # Request necessary fields
         "limit": limit
     }
-    headers = {
-        # It's good practice to identify your application in the User-Agent header
-        "User-Agent": "StreamlitGeminiPaperSummarizer/1.0 (contact@example.com)"
-    }
     try:
-        response = requests.get(SEMANTIC_SCHOLAR_API_URL, params=params, headers=headers)
+        response = get_http_session().get(SEMANTIC_SCHOLAR_API_URL, params=params, timeout=10)
         response.raise_for_status()  # Raise an HTTPError for bad responses (4xx or 5xx)
-        data = response.json()
-        if data and 'data' in data:
-            papers = []
-            for item in data['data']:
-                papers.append({
-                    "title": item.get("title", "No Title Available"),
-                    "abstract": item.get("abstract", "No Abstract Available."),
-                    "url": item.get("url", "#"),
-                    "authors": ", ".join([a['name'] for a in item.get('authors', [])])
-                })
-            return papers
-        else:
-            return []
+        data = response.json() or {}
+        return [
+            {
+                "title": item.get("title", "No Title Available"),
+                "abstract": item.get("abstract", "No Abstract Available."),
+                "url": item.get("url", "#"),
+                "authors": ", ".join(a['name'] for a in item.get('authors') or ())
+            }
+            for item in data.get('data') or ()
+        ]
     except requests.exceptions.RequestException as e:
         st.error(f"Error searching Semantic Scholar: {e}")
         return []
 
-def get_gemini_summary(api_key: str, paper_abstract: str):
+def get_gemini_summary(client, paper_abstract: str):
     """
     Generates a concise summary of a paper abstract using Google Gemini.
+    Returns (summary, error). Makes no Streamlit calls, so it is safe to run in a worker thread.
     """
-    if not api_key:
-        return None
-
     try:
-        genai.configure(api_key=api_key)
-        # Using gemini-1.5-flash as it's good for summarization and cost-effective
-        client = genai.GenerativeModel("gemini-2.5-flash")
-
         # Craft a specific prompt for summarization
         prompt = f"""Summarize the following research paper abstract concisely in 3-4 sentences.
         Focus on the main objective, methodology, key findings, and conclusion.
@@ -64,11 +87,53 @@ def get_gemini_summary(api_key: str, paper_abstract: str):
 
         Summary:
         """
-        response = client.generate_content(prompt)
-        return response.text
+        generation_config = {
+            "max_output_tokens": SUMMARY_MAX_OUTPUT_TOKENS + THINKING_TOKEN_HEADROOM,
+            "temperature": SUMMARY_TEMPERATURE,
+        }
+        return cached_text(GEMINI_MODEL, prompt, lambda: client.generate_content(prompt, generation_config=generation_config).text), None
+    except Exception as e:
+        return None, str(e)
+
+def get_gemini_summaries(client, paper_abstracts: list):
+    """
+    Generates concise summaries for several paper abstracts with a single Google Gemini request.
+    Returns (summaries, error), with the summaries in the same order as the abstracts.
+    """
+    if not paper_abstracts:
+        return None, None
+
+    try:
+        # One prompt for all abstracts: a single round-trip instead of one per paper
+        numbered_abstracts = "\n\n---\n\n".join(
+            f"[{i}] {abstract}" for i, abstract in enumerate(paper_abstracts)
+        )
+        prompt = f"""Summarize each of the following research paper abstracts concisely in 3-4 sentences.
+        Focus on the main objective, methodology, key findings, and conclusion.
+        Return a JSON list of strings, one summary per abstract, in the same order.
+
+        Abstracts:
+        {numbered_abstracts}
+        """
+
+        def generate() -> str:
+            response = client.generate_content(
+                prompt,
+                generation_config={
+                    "response_mime_type": "application/json",
+                    "max_output_tokens": SUMMARY_MAX_OUTPUT_TOKENS * len(paper_abstracts) + THINKING_TOKEN_HEADROOM,
+                    "temperature": SUMMARY_TEMPERATURE,
+                }
+            )
+            # Validate before the response text is cached
+            summaries = json.loads(response.text)
+            if not isinstance(summaries, list) or len(summaries) != len(paper_abstracts):
+                raise ValueError("Gemini returned an unexpected number of summaries.")
+            return response.text
+
+        return json.loads(cached_text(GEMINI_MODEL, prompt, generate)), None
     except Exception as e:
-        st.error(f"Error generating summary with Gemini: {e}")
-        return None
+        return None, str(e)
 
 # --- Streamlit App ---
 
@@ -121,21 +186,39 @@ if st.button("Find Papers and Summarize", disabled=button_disabled):
             else:
                 st.success(f"Found {len(found_papers)} relevant papers. Generating summaries...")
 
-                for i, paper in enumerate(found_papers):
+                # Step 2: Summarize all abstracts using a single Gemini request.
+                # The model is resolved here, on the script thread, before any worker threads start.
+                client = get_gemini_model(gemini_api_key)
+                summaries, batch_error = get_gemini_summaries(client, [paper['abstract'] for paper in found_papers])
+                errors = [None] * len(found_papers)
+                if summaries is None:
+                    # Fall back to one request per paper, fanned out concurrently so a single
+                    # bad abstract doesn't lose every summary
+                    with ThreadPoolExecutor(max_workers=len(found_papers)) as executor:
+                        results = list(executor.map(
+                            lambda paper: get_gemini_summary(client, paper['abstract']),
+                            found_papers
+                        ))
+                    summaries = [summary for summary, _ in results]
+                    errors = [error for _, error in results]
+                    if not any(summaries):
+                        # only worth reporting when the per-paper requests failed too
+                        st.error(f"Error generating summaries with Gemini: {batch_error}")
+
+                for i, (paper, summary, error) in enumerate(zip(found_papers, summaries, errors)):
                     st.markdown(f"---")
                     st.subheader(f"Paper {i+1}: {paper['title']}")
                     st.markdown(f"**Authors:** {paper['authors']}")
                     st.markdown(f"**Abstract:** {paper['abstract']}")
                     st.markdown(f"**Link:** [Read on Semantic Scholar]({paper['url']})")
 
-                    # Step 2: Summarize each paper's abstract using Gemini
-                    summary = get_gemini_summary(gemini_api_key, paper['abstract'])
-
                     if summary:
                         st.markdown(f"**Gemini Summary:**")
                         st.info(summary)
                     else:
                         st.warning("Could not generate a summary for this paper using Gemini.")
+                        if error:
+                            st.error(f"Error generating summary with Gemini: {error}")
 
 st.markdown("---")
 st.caption("Powered by Google Gemini and Semantic Scholar API.")
\ No newline at end of file
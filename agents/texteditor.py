@@ -1,5 +1,8 @@
+import codecs
 import streamlit as st
 
+UPLOAD_CHUNK_SIZE = 1 << 20  # bytes read per step while decoding an upload
+
 # --- Session State Initialization ---
 # Initialize the content of the editor. This variable will hold the actual text.
 if 'editor_content' not in st.session_state:
@@ -31,8 +34,17 @@ def new_file():
     st.session_state.current_file_name = "untitled.txt"
     st.session_state.filename_input_value = "untitled.txt"
     st.success("New file created! Editor cleared.")
-    # A rerun is necessary to immediately update the `st.text_area` and `st.text_input` widgets
-    st.experimental_rerun()
+    # No explicit rerun needed: callbacks run before the script, so the widgets pick up the new state
+
+def decode_upload(uploaded_file) -> str:
+    """Decode an uploaded file as UTF-8 in fixed-size chunks instead of reading it whole first."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    parts = []
+    uploaded_file.seek(0)
+    while chunk := uploaded_file.read(UPLOAD_CHUNK_SIZE):
+        parts.append(decoder.decode(chunk))
+    parts.append(decoder.decode(b"", final=True))
+    return "".join(parts)
 
 def update_current_file_name_from_input():
     """
@@ -49,21 +61,24 @@ uploaded_file = st.file_uploader(
     help="Select a text-based file from your computer to load its content into the editor."
 )
 
+# Load each upload once; the uploader keeps returning the same file on later reruns,
+# and reloading it would overwrite the user's edits.
+upload_id = None
 if uploaded_file is not None:
+    upload_id = getattr(uploaded_file, "file_id", None) or f"{uploaded_file.name}:{uploaded_file.size}"
+if upload_id is not None and upload_id != st.session_state.get("loaded_upload_id"):
+    st.session_state.loaded_upload_id = upload_id
     try:
         # Read the file content, assuming UTF-8 encoding
-        file_contents = uploaded_file.read().decode('utf-8')
+        file_contents = decode_upload(uploaded_file)
         
         # Update session state variables with the loaded file's data
         st.session_state.editor_content = file_contents  # Update editor content
         st.session_state.current_file_name = uploaded_file.name  # Update current file name
         st.session_state.filename_input_value = uploaded_file.name  # Update the save input field
         
+        # The widgets below are created after this point, so they render the new content in this same run
         st.success(f"File '{uploaded_file.name}' loaded successfully!")
-        
-        # A rerun is essential here to force the `st.text_area` and `st.text_input`
-        # widgets to re-render with the new content from session state.
-        st.experimental_rerun()
     except UnicodeDecodeError:
         st.error(f"Error: Could not decode '{uploaded_file.name}' as UTF-8. Please ensure it's a plain text file.")
     except Exception as e:
@@ -1,5 +1,7 @@
+from __future__ import annotations
 import os
 import json
+import hashlib
 import numpy as np
 import faiss
 import streamlit as st
@@ -8,19 +10,56 @@ import streamlit.components.v1 as components
 from google import genai
 from google.genai import types
 
+try:
+    import orjson
+except ImportError:  # orjson not installed: fall back to the stdlib parser
+    orjson = None
+
+try:
+    import diskcache
+except ImportError:  # diskcache not installed: embeddings are cached in memory only
+    diskcache = None
+
+try:
+    from utils.llm_cache import cached_generate_stream
+except ImportError:  # run outside the AgentX repo root: no response cache
+    def cached_generate_stream(client, model, prompt, config=None, **_):
+        for chunk in client.models.generate_content_stream(model=model, contents=prompt, config=config):
+            if chunk.text:
+                yield chunk.text
+
 # -----------------------------
 # CONFIG
 # -----------------------------
 st.set_page_config(page_title="Voice Agent with Gemini", page_icon="🎙️")
 
 API_KEY = ""  # <-- put your key or use env var
-client = genai.Client(api_key=API_KEY)
+
+
+@st.cache_resource(show_spinner=False)
+def get_client(api_key: str):
+    # Reuse one client (and its HTTP connection pool) across reruns
+    return genai.Client(api_key=api_key)
+
+
+client = get_client(API_KEY)
 
 # RAG config
 EMBED_MODEL = "text-embedding-004"   # same model you used to embed the PDF
-INDEX_PATH = "zomato_support.faiss"
+# IVF-PQ index from utils/rebuild_faiss_index.py when present, else the original flat index
+INDEX_PATH = "zomato_support_ivfpq.faiss" if os.path.exists("zomato_support_ivfpq.faiss") else "zomato_support.faiss"
 CHUNKS_PATH = "zomato_support_chunks.json"
 TOP_K = 5  # how many chunks to retrieve
+EMBED_CACHE_DIR = ".embed_cache"  # on-disk query embedding cache (shared across sessions)
+ANSWER_CACHE_TTL_SECONDS = 3600
+ANSWER_SYSTEM_INSTRUCTION = (
+    "You are a voice assistant for Zomato customer support. "
+    "Answer concisely in plain text. "
+    "Use at most 5 short lines."
+)
+
+# Pin FAISS's OpenMP pool so searches don't oversubscribe cores shared with Streamlit's threads
+faiss.omp_set_num_threads(min(8, os.cpu_count() or 1))
 
 
 # -----------------------------
@@ -28,13 +67,60 @@ TOP_K = 5  # how many chunks to retrieve
 # -----------------------------
 @st.cache_resource
 def load_faiss_index(index_path: str):
-    return faiss.read_index(index_path)
+    """
+    Memory-map the index read-only so vectors are backed by the page cache
+    instead of a private in-process copy.
+    """
+    try:
+        index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    except RuntimeError:
+        # index type without mmap support: load it fully into memory
+        index = faiss.read_index(index_path)
+
+    # Warm up once per process: a throwaway search faults in the quantizer / vectors and
+    # starts the OpenMP pool, so the first real question doesn't pay for it.
+    index.search(np.zeros((1, index.d), dtype="float32"), TOP_K)
+
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.parallel_mode = 1  # parallelize over inverted lists: the page searches one query at a time
+    return index
+
+
+class ChunkStore:
+    """
+    Read-only chunk list backed by one UTF-8 blob and an offsets array
+    (built by utils/build_chunk_store.py); chunks are decoded on access.
+    """
+
+    def __init__(self, blob_path: str, offsets_path: str):
+        with open(blob_path, "rb") as f:
+            self.blob = f.read()
+        self.offsets = np.load(offsets_path, mmap_mode="r")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].decode("utf-8")
+
+    def take(self, ids) -> list:
+        return [self[i] for i in ids]
 
 
 @st.cache_resource
 def load_chunks(chunks_path: str):
-    with open(chunks_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    base = os.path.splitext(chunks_path)[0]
+    if os.path.exists(base + ".bin") and os.path.exists(base + ".offsets.npy"):
+        return ChunkStore(base + ".bin", base + ".offsets.npy")
+
+    with open(chunks_path, "rb") as f:
+        data = f.read()
+    parsed = orjson.loads(data) if orjson is not None else json.loads(data)
+    # 1-D object array so search results can be gathered with one fancy-indexing call
+    arr = np.empty(len(parsed), dtype=object)
+    arr[:] = parsed
+    return arr
 
 
 # Try loading index + chunks once
@@ -45,34 +131,99 @@ try:
 except Exception as e:
     RAG_ENABLED = False
     index = None
-    chunks = []
+    chunks = np.empty(0, dtype=object)
     st.warning(f"RAG disabled (could not load index/chunks): {e}")
 
+# IVF part of the index (None for flat indexes); nprobe is tunable from the sidebar
+ivf_index = faiss.try_extract_index_ivf(index) if index is not None else None
+
+
+@st.cache_resource
+def load_embed_store(cache_dir: str):
+    return diskcache.Cache(cache_dir) if diskcache is not None else None
+
+
+def normalize_query(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _embed_key(text: str) -> str:
+    return f"{EMBED_MODEL}:{hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()}"
+
+
+def embed_queries(texts: list[str]) -> np.ndarray:
+    """
+    Get normalized embeddings for several queries as a (len(texts), d) matrix.
+    Queries missing from the on-disk store are embedded in a single Gemini request.
+    """
+    store = load_embed_store(EMBED_CACHE_DIR)
+    normalized = [normalize_query(t) for t in texts]
+    vectors = {}
+    missing = []
+    for text in dict.fromkeys(normalized):
+        blob = store.get(_embed_key(text)) if store is not None else None
+        if blob is not None:
+            # stored vectors are already L2-normalized
+            vectors[text] = np.frombuffer(blob, dtype="float32")
+        else:
+            missing.append(text)
+
+    if missing:
+        resp = client.models.embed_content(
+            model=EMBED_MODEL,
+            contents=missing,
+        )
+        matrix = np.asarray([e.values for e in resp.embeddings], dtype="float32")
+        faiss.normalize_L2(matrix)
+        for text, vec in zip(missing, matrix):
+            vectors[text] = vec
+            if store is not None:
+                store.set(_embed_key(text), vec.tobytes())
+
+    return np.vstack([vectors[t] for t in normalized])
+
+
+@st.cache_data(max_entries=1024, show_spinner=False)
+def _embed_normalized_query(text: str) -> np.ndarray:
+    # In-memory LRU (st.cache_data survives reruns, unlike a module-level functools.lru_cache),
+    # backed by the on-disk store used by embed_queries.
+    return embed_queries([text])
+
 
 def embed_query(text: str) -> np.ndarray:
     """
     Get a normalized embedding for the query text using Gemini.
+    Repeated (case/whitespace-insensitive) queries are served from cache.
     """
-    resp = client.models.embed_content(
-        model=EMBED_MODEL,
-        contents=text,
-    )
-    vec = np.array(resp.embeddings[0].values, dtype="float32").reshape(1, -1)
-    faiss.normalize_L2(vec)
-    return vec
+    return _embed_normalized_query(normalize_query(text))
+
+
+def search_index(q_mat: np.ndarray, k: int):
+    """index.search, with the sidebar's nprobe passed per call so the shared index isn't mutated."""
+    if ivf_index is not None:
+        nprobe = st.session_state.get("nprobe", ivf_index.nprobe)
+        return index.search(q_mat, k, params=faiss.SearchParametersIVF(nprobe=nprobe))
+    return index.search(q_mat, k)
+
+
+def select_chunks(ids: np.ndarray) -> list:
+    """Chunks for one row of FAISS result ids, skipping the -1 padding."""
+    valid = ids[ids != -1]
+    if isinstance(chunks, ChunkStore):
+        return chunks.take(valid)
+    return chunks[valid].tolist()
 
 
 def retrieve_relevant_chunks(question_text: str, k: int = TOP_K):
     """
     Retrieve top-k relevant chunks from FAISS index.
     """
-    if not RAG_ENABLED or index is None or not chunks:
+    if not RAG_ENABLED or index is None or len(chunks) == 0:
         return []
 
     q_vec = embed_query(question_text)
-    scores, idxs = index.search(q_vec, k)
-    idxs = idxs[0]
-    return [chunks[i] for i in idxs if i != -1]
+    scores, idxs = search_index(q_vec, k)
+    return select_chunks(idxs[0])
 
 
 # -----------------------------
@@ -121,9 +272,10 @@ def ask_gemini(question_text):
     """
     Ask Gemini, but first retrieve relevant chunks from FAISS (RAG).
     Answer concisely, like a Zomato customer support voice agent.
+    Yields the answer text as it streams in.
     """
     if not question_text:
-        return ""
+        return
 
     # --- RAG retrieval ---
     context_chunks = retrieve_relevant_chunks(question_text)
@@ -144,18 +296,15 @@ USER QUESTION:
 {question_text}
 """.strip()
 
-    response = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            system_instruction=(
-                "You are a voice assistant for Zomato customer support. "
-                "Answer concisely in plain text. "
-                "Use at most 5 short lines."
-            ),
-        ),
+    # Identical prompt (same question and retrieved context): replay the earlier answer.
+    # The cache key includes the config, so it covers the system instruction too.
+    yield from cached_generate_stream(
+        client,
+        "gemini-2.5-flash",
+        prompt,
+        types.GenerateContentConfig(system_instruction=ANSWER_SYSTEM_INSTRUCTION),
+        expire=ANSWER_CACHE_TTL_SECONDS,
     )
-    return (response.text or "").strip()
 
 
 def speak_answer_js(text: str):
@@ -186,10 +335,20 @@ st.title("🎙️ Voice Agent (Gemini 2.5 Flash + RAG)")
 st.caption("Speak your question, confirm the text, then get a Zomato-specific answer with voice playback.")
 
 if RAG_ENABLED:
-    st.success("RAG is enabled using zomato_support.faiss and zomato_support_chunks.json.")
+    st.success(f"RAG is enabled using {INDEX_PATH} and {CHUNKS_PATH}.")
 else:
     st.info("RAG is currently disabled; answering without FAISS context.")
 
+if ivf_index is not None:
+    st.sidebar.slider(
+        "FAISS nprobe (IVF lists scanned per query)",
+        min_value=1,
+        max_value=min(ivf_index.nlist, 128),
+        value=min(ivf_index.nprobe, ivf_index.nlist, 128),
+        key="nprobe",
+        help="Higher values improve recall at the cost of search time.",
+    )
+
 st.markdown("#### 1️⃣ Record your question")
 
 # Built-in Streamlit audio recorder (includes start/stop mic UI)
@@ -244,23 +403,28 @@ st.session_state.transcript = st.text_area(
 st.markdown("#### 3️⃣ Ask Gemini & listen to the answer")
 
 ask_btn = st.button("🤖 Ask Gemini", type="primary", use_container_width=True)
+answer_streamed = False
 
 if ask_btn:
     if not st.session_state.transcript.strip():
         st.warning("Please transcribe and/or enter a question first.")
     else:
-        with st.spinner("Getting answer from Gemini (with RAG)..."):
-            try:
-                st.session_state.answer = ask_gemini(st.session_state.transcript.strip())
-            except Exception as e:
-                st.error(f"Error calling Gemini: {e}")
+        try:
+            st.markdown("##### Answer:")
+            # Render tokens as they arrive; write_stream returns the full text
+            answer = st.write_stream(ask_gemini(st.session_state.transcript.strip()))
+            st.session_state.answer = (answer if isinstance(answer, str) else "".join(map(str, answer))).strip()
+            answer_streamed = True
+        except Exception as e:
+            st.error(f"Error calling Gemini: {e}")
 
 # -----------------------------
 # Show answer + Speak button
 # -----------------------------
 if st.session_state.answer:
-    st.markdown("##### Answer:")
-    st.markdown(st.session_state.answer)
+    if not answer_streamed:
+        st.markdown("##### Answer:")
+        st.markdown(st.session_state.answer)
 
     speak_btn = st.button("🔊 Speak answer", use_container_width=True)
     if speak_btn:
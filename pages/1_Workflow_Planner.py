@@ -1,17 +1,136 @@
 from __future__ import annotations
 import io
+import json
+import textwrap
+from collections import deque
 import streamlit as st
-import matplotlib.pyplot as plt  # noqa: F401  (used by generated code)
+from matplotlib.figure import Figure
+from matplotlib.patches import FancyBboxPatch
 from utils.styles import inject_base_styles
 from utils.gemini_client import setup_gemini
+from utils.llm_cache import cached_text, cached_generate_stream
+
+try:
+    import orjson
+except ImportError:  # orjson not installed: fall back to the stdlib parser
+    orjson = None
+
+WORKFLOW_CACHE_TTL_SECONDS = 3600  # how long a generated workflow is reused for an identical idea
+
+# Diagram layout (data units): box width, horizontal / vertical spacing between box centers
+BOX_WIDTH = 2.6
+X_GAP = 3.2
+Y_GAP = 1.6
+LABEL_WRAP = 24
+
+
+def parse_workflow_spec(text: str) -> dict:
+    """Validate the model's JSON into {"nodes": [{id, label}], "edges": [{from, to}]}."""
+    raw = orjson.loads(text) if orjson is not None else json.loads(text)
+    if not isinstance(raw, dict) or not isinstance(raw.get("nodes"), list) or not raw["nodes"]:
+        raise ValueError("Diagram spec has no nodes.")
+
+    nodes = []
+    for i, n in enumerate(raw["nodes"]):
+        if not isinstance(n, dict):
+            raise ValueError(f"Invalid node: {n!r}")
+        node_id = str(n.get("id", i))
+        nodes.append({"id": node_id, "label": str(n.get("label", node_id))})
+    ids = {n["id"] for n in nodes}
+
+    edges = [
+        {"from": str(e["from"]), "to": str(e["to"])}
+        for e in raw.get("edges") or []
+        if isinstance(e, dict) and str(e.get("from")) in ids and str(e.get("to")) in ids
+    ]
+    return {"nodes": nodes, "edges": edges}
+
+
+def _layout(nodes: list, edges: list) -> dict:
+    """Place nodes in rows by BFS depth from the start nodes, each row centered on x=0."""
+    ids = [n["id"] for n in nodes]
+    children = {i: [] for i in ids}
+    has_parent = set()
+    for e in edges:
+        children[e["from"]].append(e["to"])
+        has_parent.add(e["to"])
+
+    level = {}
+    queue = deque()
+    for start in [i for i in ids if i not in has_parent] or ids[:1]:
+        level[start] = 0
+        queue.append(start)
+    while True:
+        while queue:
+            n = queue.popleft()
+            for c in children[n]:
+                if c not in level:
+                    level[c] = level[n] + 1
+                    queue.append(c)
+        unplaced = [i for i in ids if i not in level]
+        if not unplaced:
+            break
+        # only reachable through a cycle: start a new row below everything placed so far
+        level[unplaced[0]] = max(level.values()) + 1
+        queue.append(unplaced[0])
+
+    rows = {}
+    for i in ids:
+        rows.setdefault(level[i], []).append(i)
+    return {
+        node_id: ((j - (len(row) - 1) / 2) * X_GAP, -depth * Y_GAP)
+        for depth, row in rows.items()
+        for j, node_id in enumerate(row)
+    }
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def render_workflow(spec_json: str) -> bytes:
+    """Render a spec from parse_workflow_spec (as canonical JSON) to PNG bytes."""
+    spec = json.loads(spec_json)
+    nodes, edges = spec["nodes"], spec["edges"]
+    pos = _layout(nodes, edges)
+    labels = {n["id"]: textwrap.fill(n["label"], LABEL_WRAP) for n in nodes}
+    heights = {i: 0.45 + 0.22 * label.count("\n") for i, label in labels.items()}
+
+    xs = [x for x, _ in pos.values()]
+    ys = [y for _, y in pos.values()]
+    fig = Figure(figsize=(max(6.0, (max(xs) - min(xs) + X_GAP) * 0.9), max(4.0, (max(ys) - min(ys) + Y_GAP) * 0.9)))
+    ax = fig.add_subplot()
+    ax.set_xlim(min(xs) - X_GAP / 2, max(xs) + X_GAP / 2)
+    ax.set_ylim(min(ys) - Y_GAP / 2, max(ys) + Y_GAP / 2)
+    ax.axis("off")
+
+    for node_id, (x, y) in pos.items():
+        h = heights[node_id]
+        ax.add_patch(FancyBboxPatch(
+            (x - BOX_WIDTH / 2, y - h / 2), BOX_WIDTH, h,
+            boxstyle="round,pad=0.08", facecolor="#e8f0fe", edgecolor="#1a73e8",
+        ))
+        ax.text(x, y, labels[node_id], ha="center", va="center", fontsize=8)
+
+    for e in edges:
+        (x1, y1), (x2, y2) = pos[e["from"]], pos[e["to"]]
+        if y2 < y1:
+            # forward edge: bottom of the source box to the top of the target box
+            start, end, style = (x1, y1 - heights[e["from"]] / 2), (x2, y2 + heights[e["to"]] / 2), "arc3"
+        else:
+            # loop back / same row: right side to right side, curved
+            start, end, style = (x1 + BOX_WIDTH / 2, y1), (x2 + BOX_WIDTH / 2, y2), "arc3,rad=-0.4"
+        ax.annotate("", xy=end, xytext=start, arrowprops=dict(arrowstyle="->", color="#555555", connectionstyle=style))
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight")
+    return buf.getvalue()
+
 
 inject_base_styles()
 st.title("Agent Workflow Planner")
 
 prompt = st.text_area("Enter your idea or task for the agent:")
 
-client = setup_gemini()
-
+# The Gemini client (and with it the google.genai SDK) is only set up once a button is
+# clicked, so opening the page or editing the prompt does not import the SDK.
 colA, colB = st.columns(2)
 
 with colA:
@@ -21,59 +140,48 @@ with colA:
             "Generate a detailed, step-by-step ~500-word workflow that an AI agent should follow to accomplish this task.\n"
             "Break into clear phases, include decision points if needed, be practical and logically ordered.\n"
         )
+        client = setup_gemini()
         try:
-            response = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=gemini_prompt_text,
-            )
-            workflow_text = getattr(response, "text", None) or "No content returned."
+            # Stream the ~500-word answer so it renders as it is generated; repeats come from cache
+            stream = cached_generate_stream(client, "gemini-2.5-flash", gemini_prompt_text, expire=WORKFLOW_CACHE_TTL_SECONDS)
             st.subheader("Proposed Agent Workflow")
-            st.write(workflow_text)
+            workflow_text = st.write_stream(stream)
+            if not workflow_text:
+                st.write("No content returned.")
         except Exception as e:
             st.error(f"Error generating workflow: {e}")
 
 with colB:
     if st.button("Generate Workflow Diagram", use_container_width=True) and prompt:
         gemini_prompt_diagram = (
-            f"Write Python code using matplotlib.pyplot and matplotlib.patches to draw a workflow diagram for the idea: '{prompt}'. "
-            "The code should define workflow steps, draw labeled boxes with arrows, and create a matplotlib figure object named 'fig'. "
-            "Do not include any code for displaying or saving the image."
+            f"Design a workflow diagram for the idea: '{prompt}'. "
+            'Return only JSON of the form {"nodes": [{"id": "...", "label": "..."}], "edges": [{"from": "<id>", "to": "<id>"}]}. '
+            "Use one node per workflow step or decision point with a short label (at most 8 words), "
+            "list nodes in workflow order, and add an edge for every transition between steps."
         )
+        client = setup_gemini()
         try:
-            response = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=gemini_prompt_diagram,
-            )
-            code = getattr(response, "text", "")
-
-            # Execute generated code skipping the first/last lines if fenced code is returned
-            code_lines = code.splitlines()
-            if len(code_lines) >= 2 and code_lines[0].strip().startswith("```"):
-                # Strip fences
-                inner = []
-                for line in code_lines[1:]:
-                    if line.strip() == "```":
-                        break
-                    inner.append(line)
-                code_to_exec = "\n".join(inner)
-            else:
-                code_to_exec = code
-
-            local_vars = {}
+            from google.genai import types
+            config = types.GenerateContentConfig(response_mime_type="application/json")
+            returned = {}
+
+            def generate() -> str:
+                text = client.models.generate_content(
+                    model="gemini-2.5-flash", contents=gemini_prompt_diagram, config=config
+                ).text or ""
+                returned["text"] = text
+                parse_workflow_spec(text)  # raises before caching, so an invalid spec is retried next time
+                return text
+
             try:
-                exec(code_to_exec, {"plt": plt}, local_vars)
-            except Exception as e:
-                st.error(f"Error executing generated code: {e}")
-                st.code(code_to_exec, language="python")
-                raise
-
-            fig = local_vars.get("fig", None)
-            if fig is not None:
-                buf = io.BytesIO()
-                fig.savefig(buf, format="png", bbox_inches="tight")
-                buf.seek(0)
-                st.image(buf, caption="Generated Workflow Diagram")
-            else:
-                st.error("No figure named 'fig' was created by generated code.")
+                spec = parse_workflow_spec(cached_text(
+                    "gemini-2.5-flash", gemini_prompt_diagram, generate, config, expire=WORKFLOW_CACHE_TTL_SECONDS
+                ))
+            except ValueError as e:
+                st.error(f"Invalid diagram spec from the model: {e}")
+                st.code(returned.get("text", ""), language="json")
+                st.stop()
+
+            st.image(render_workflow(json.dumps(spec, sort_keys=True)), caption="Generated Workflow Diagram")
         except Exception as e:
             st.error(f"Error generating diagram: {e}")
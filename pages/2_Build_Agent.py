@@ -1,13 +1,19 @@
 from __future__ import annotations
-import sys
-import subprocess
 import os
-import re
 import streamlit as st
 from utils.styles import inject_base_styles
 from utils.gemini_client import setup_gemini
+from utils.filenames import sanitize_filename
+from utils.agent_files import write_text_atomic
 from pathlib import Path
 
+
+@st.cache_data(ttl=2, show_spinner=False)
+def _agents_set(agents_dir: str) -> frozenset[str]:
+    """File names in the agents directory; one listdir per 2 s instead of a stat per rerun."""
+    return frozenset(os.listdir(agents_dir))
+
+
 inject_base_styles()
 st.title("AgentX — Agent Builder")
 
@@ -106,35 +112,14 @@ if st.button("Generate & Show App Code", type="primary"):
             app_file = "generated_app.py"
             st.session_state["generated_app_file"] = app_file
             try:
-                with open(app_file, "w", encoding="utf-8") as f:
-                    f.write(cleaned_code)
+                write_text_atomic(app_file, cleaned_code)
                 st.success(f"✅ App saved as `{app_file}`")
-
-                st.markdown(
-                    f"""
-                    ### ▶️ Running App...
-                    In case it doesn’t open automatically, run:
-
-                    ```bash
-                    python -m streamlit run {app_file}
-                    ```
-                    """
-                )
-
-                # Auto-launch generated app
-                try:
-                    if sys.platform == "win32":
-                        # Use start to open a new cmd window and run the streamlit app
-                        subprocess.Popen(f'start cmd /k python -m streamlit run {app_file}', shell=True)
-                    else:
-                        # many Linux desktops provide x-terminal-emulator; if not available this will silently fail
-                        subprocess.Popen(["x-terminal-emulator", "-e", "streamlit", "run", app_file])
-                except Exception:
-                    # non-fatal: just continue
-                    pass
-
             except Exception as e:
-                st.error(f"⚠️ Error while saving or launching generated code: {e}")
+                st.error(f"⚠️ Error while saving generated code: {e}")
+
+            # The app is not launched from the server; the user runs it from their own terminal
+            st.markdown("### ▶️ Run the App")
+            st.code(f"python -m streamlit run {app_file}", language="bash")
 
             # ---------------------------
             # NEW: Save agent to ./agents/ as agent_name.py
@@ -154,13 +139,6 @@ else:
     # prefer session_state copy if present
     code_to_save = st.session_state.get("cleaned_code", globals().get("cleaned_code", ""))
 
-    def sanitize_filename(name: str) -> str:
-        name = (name or "").strip()
-        name = re.sub(r"[^A-Za-z0-9_-]", "_", name)
-        if not name:
-            name = "agent"
-        return name
-
     agents_dir = os.path.join(os.getcwd(), "agents")
     os.makedirs(agents_dir, exist_ok=True)
 
@@ -194,10 +172,8 @@ else:
             if os.path.exists(final_path) and not overwrite:
                 st.session_state["agent_save_error"] = "File exists and overwrite not confirmed."
                 return
-            tmp_path = final_path + ".tmp"
-            with open(tmp_path, "w", encoding="utf-8") as f:
-                f.write(code_to_save)
-            os.replace(tmp_path, final_path)
+            write_text_atomic(final_path, code_to_save)
+            _agents_set.clear()
             st.session_state["agent_saved"] = True
             st.session_state["agent_saved_path"] = f"./agents/{safe_name}.py"
             st.session_state["agent_save_error"] = ""
@@ -214,8 +190,7 @@ else:
 
         # show overwrite checkbox only if file exists (we must compute preview path from current name)
         preview_name = sanitize_filename(st.session_state.get("form_agent_name", ""))
-        preview_path = os.path.join(agents_dir, f"{preview_name}.py")
-        if os.path.exists(preview_path):
+        if f"{preview_name}.py" in _agents_set(agents_dir):
             st.warning(f"File `./agents/{preview_name}.py` already exists.")
             st.checkbox(
                 "I understand this will overwrite the existing file",
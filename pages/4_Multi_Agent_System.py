@@ -6,11 +6,10 @@ import shlex
 import subprocess
 from pathlib import Path
 import streamlit as st
-import re
 from utils.gemini_client import setup_gemini
-
-# If you use a helper to create a Gemini client (like setup_gemini), import it.
-# from utils.gemini_client import setup_gemini
+from utils.llm_cache import cached_text
+from utils.agent_files import list_agents, read_preview, write_text_atomic
+from utils.filenames import sanitize_filename
 
 st.set_page_config(page_title="Multi-Agent System", page_icon="🤖")
 
@@ -22,14 +21,6 @@ st.write(
 AGENTS_DIR = Path.cwd() / "agents"
 AGENTS_DIR.mkdir(parents=True, exist_ok=True)
 
-# Utility: sanitize filenames
-def sanitize_filename(name: str) -> str:
-    name = (name or "").strip()
-    name = re.sub(r"[^A-Za-z0-9_-]", "_", name)
-    if not name:
-        name = "multi_agent"
-    return name
-
 # Utility: build a cross-platform streamlit run command (no POSIX-only single quotes)
 def build_streamlit_run_cmd(path: Path) -> str:
     if os.name == "nt":  # Windows
@@ -37,8 +28,47 @@ def build_streamlit_run_cmd(path: Path) -> str:
     else:
         return f"python3 -m streamlit run {shlex.quote(str(path))}"
 
+# How long a generated orchestrator is reused for an identical prompt before asking the model again
+ORCHESTRATOR_RESPONSE_TTL_SECONDS = 24 * 3600
+
+
+def extract_python_block(raw: str) -> str:
+    """Body of the first ```python fenced block, or raw unchanged if there is none.
+    Fences are matched on stripped lines, so indented fences are recognized too."""
+    lines = raw.splitlines()
+    start = None
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped.startswith("```python"):
+            start = i
+        elif stripped == "```" and start is not None:
+            return "\n".join(lines[start + 1 : i])
+    return raw
+
+
+PROMPT_TEMPLATE = """
+You are asked to generate a Python Streamlit orchestrator agent that combines multiple existing agents into a single application.
+Agents:
+{agents}
+
+Connection / orchestration description:
+{description}
+
+Combine the functionality of the selected agents into a application that coordinates their actions as described.
+
+Output only the Python file contents inside a fenced code block (```python ... ```). Do not include any extra commentary outside code fences.
+"""
+
+
+def build_prompt(selected: list[str], description: str) -> str:
+    """Orchestrator generation prompt: the selected agents' paths plus the user's description."""
+    return PROMPT_TEMPLATE.format(
+        agents="\n".join(f"- {name}: path='./agents/{name}'" for name in selected),
+        description=description,
+    )
+
 # List available agents
-agent_files = sorted([p for p in AGENTS_DIR.glob("*.py") if p.is_file()])
+agent_files = list_agents(AGENTS_DIR)
 
 if not agent_files:
     st.info("No agents found in `./agents/`. Create agents first in Agent Builder.")
@@ -65,6 +95,7 @@ with st.expander("Advanced options", expanded=False):
     run_with_streamlit = st.checkbox("Run generated orchestrator with `streamlit run` after creation", value=False)
     gemini_api_key = st.text_input("Optional Gemini API key (used only in example code placeholders)", type="password")
     model_name = st.text_input("Model to reference in example code", value="gemini-2.5-flash")
+    regenerate = st.checkbox("Regenerate (ignore a previously generated orchestrator for the same prompt)", value=False)
 
 # Prepare submit
 if "generated_multi_agent" not in st.session_state:
@@ -75,14 +106,15 @@ if "generated_multi_agent_path" not in st.session_state:
 # Show selected agents preview
 if selected:
     st.markdown("**Selected agents**")
+    # One code block for all previews instead of one element per agent
+    sections = []
     for name in selected:
-        p = AGENTS_DIR / name
         try:
-            text = p.read_text(encoding="utf-8")
-            preview = text[:600] + ("...\n(Preview truncated)" if len(text) > 600 else "")
-            st.code(preview, language="python")
+            sections.append(f"# ===== {name} =====\n{read_preview(AGENTS_DIR / name, 600)}")
         except Exception as e:
             st.error(f"Unable to read `{name}`: {e}")
+    if sections:
+        st.code("\n\n".join(sections), language="python")
 
 # Use a form to bundle inputs and avoid lost clicks
 with st.form("multi_agent_form"):
@@ -95,36 +127,21 @@ if submitted:
         st.error("Provide a description of how the agents are connected.")
     else:
         # Build prompt for model (concise but explicit)
-        agents_list_text = "\n".join([f"- {name}: path='./agents/{name}'" for name in selected])
-        full_prompt = f"""
-You are asked to generate a Python Streamlit orchestrator agent that combines multiple existing agents into a single application.
-Agents:
-{agents_list_text}
-
-Connection / orchestration description:
-{connection_prompt.strip()}
+        full_prompt = build_prompt(selected, connection_prompt.strip())
 
-Combine the functionality of the selected agents into a application that coordinates their actions as described.
-
-Output only the Python file contents inside a fenced code block (```python ... ```). Do not include any extra commentary outside code fences.
-"""
-
-        # If you maintain a helper to create a Gemini client, call it here. Otherwise, assume the generator
-        # will include placeholder snippet. The user previously used `client = setup_gemini()`.
         try:
-            # Attempt to use existing client if present in globals/session_state
-            client = None
-            if "client" in globals():
-                client = globals()["client"]
-            elif "client" in st.session_state:
-                client = st.session_state["client"]
-            # If you want to force using setup_gemini, uncomment the import & call below:
-            # from utils.gemini_client import setup_gemini
+            # Cached per process by setup_gemini, so this is free after the first call
             client = setup_gemini()
 
             if client:
-                response = client.models.generate_content(model=model_name, contents=full_prompt)
-                raw = (getattr(response, "text", "") or "").strip()
+                def generate() -> str:
+                    response = client.models.generate_content(model=model_name, contents=full_prompt)
+                    return (getattr(response, "text", "") or "").strip()
+
+                raw = cached_text(
+                    model_name, full_prompt, generate,
+                    expire=ORCHESTRATOR_RESPONSE_TTL_SECONDS, refresh=regenerate,
+                )
             else:
                 # If no client available, create a helpful template prompt and fallback to a simple generator
                 st.warning("No Gemini client found in runtime — inserting a template orchestrator. If you want model-generated code, initialize `client` (setup_gemini) or provide a Gemini API key.")
@@ -137,24 +154,10 @@ Output only the Python file contents inside a fenced code block (```python ... `
         cleaned_code = ""
         if raw:
             # extract python fenced code if present
-            if "```" in raw:
-                lines = raw.splitlines()
-                start = end = None
-                for i, line in enumerate(lines):
-                    if line.strip().startswith("```python"):
-                        start = i
-                    elif line.strip() == "```" and start is not None and end is None:
-                        end = i
-                        break
-                if start is not None and end is not None and end > start:
-                    cleaned_code = "\n".join(lines[start + 1 : end])
-                else:
-                    cleaned_code = raw
-            else:
-                cleaned_code = raw
+            cleaned_code = extract_python_block(raw)
         else:
             # Fallback template (simple orchestrator)
-            sanitized_name = sanitize_filename(orchestrator_filename if orchestrator_filename else "orchestrator_agent")
+            sanitized_name = sanitize_filename(orchestrator_filename if orchestrator_filename else "orchestrator_agent", default="multi_agent")
             cleaned_code = f'''"""
 Unable to Genetate orchestrator via Gemini model.
 '''
@@ -168,8 +171,8 @@ Unable to Genetate orchestrator via Gemini model.
         app_file = "generated_app.py"
         st.session_state["generated_app_file"] = app_file
         try:
-            with open(app_file, "w", encoding="utf-8") as f:
-                f.write(cleaned_code)
+            # atomic, so a killed run never leaves a partial file for the following `streamlit run`
+            write_text_atomic(app_file, cleaned_code)
             st.success(f"✅ App saved as `{app_file}`")
 
             st.markdown(
@@ -3,11 +3,12 @@ from __future__ import annotations
 import streamlit as st
 import os
 import sys
-import subprocess
-import shlex
-import signal
+import shutil
+import tempfile
 from pathlib import Path
 from typing import Dict, Optional
+from utils import agent_launcher
+from utils.agent_files import list_agents, read_full, read_preview
 
 st.set_page_config(page_title="Agent MarketPlace", page_icon="📂")
 
@@ -21,18 +22,78 @@ AGENTS_DIR.mkdir(parents=True, exist_ok=True)
 if "agent_processes" not in st.session_state:
     st.session_state.agent_processes = {}  # type: ignore
 
+def _alive(entry: dict) -> bool:
+    """True while the process behind a registry entry is still running."""
+    if entry.get("terminal"):
+        # proc is the terminal wrapper (x-terminal-emulator, `start cmd`, osascript), which
+        # exits right away; the agent inside the window can't be observed, so keep the entry
+        # until the user stops it
+        return True
+    p = entry.get("proc")
+    if p is not None:
+        return p.poll() is None  # waitpid(WNOHANG): doesn't block
+    pid = entry.get("pid")
+    if not pid or os.name != "posix":
+        return False
+    try:
+        os.kill(pid, 0)  # launcher-started agents aren't our children: signal 0 only checks the pid
+    except OSError:
+        return False
+    return True
+
+# Drop entries whose process has exited since the last run
+st.session_state.agent_processes = {k: v for k, v in st.session_state.agent_processes.items() if _alive(v)}
+
 def human_preview(path: Path, max_chars: int = 2000) -> str:
     try:
-        text = path.read_text(encoding="utf-8")
-        return text[:max_chars] + ("...\n(Preview truncated)" if len(text) > max_chars else "")
+        return read_preview(path, max_chars)
     except Exception as e:
         return f"Error reading file: {e}"
 
+@st.cache_resource(show_spinner=False)
+def get_launcher() -> Optional[str]:
+    """
+    Start the warm launcher (utils/agent_launcher.py) once per server process and return
+    its socket path, or None where it isn't supported (no fork / UNIX sockets, e.g. Windows).
+    """
+    if not hasattr(os, "fork"):
+        return None
+    import subprocess
+    try:
+        # private (0700) directory: other local users can neither connect to nor replace the socket
+        socket_path = os.path.join(tempfile.mkdtemp(prefix="agentx-launcher-"), "launcher.sock")
+        subprocess.Popen(
+            [sys.executable, agent_launcher.__file__, socket_path, str(os.getpid())],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except Exception:
+        return None
+    return socket_path
+
+# Start it with the page so it has finished preloading by the first Run click
+LAUNCHER_SOCKET = get_launcher()
+
+# Linux terminal emulators in order of preference: name -> argv that runs cmd inside it
+_TERMINAL_ARGV = {
+    "x-terminal-emulator": lambda cmd: ["x-terminal-emulator", "-e", cmd],
+    "gnome-terminal": lambda cmd: ["gnome-terminal", "--", "bash", "-lc", f"{cmd}; exec bash"],
+    "konsole": lambda cmd: ["konsole", "-e", f"{cmd}; bash"],
+    "xterm": lambda cmd: ["xterm", "-e", f"{cmd}; bash"],
+}
+
+@st.cache_resource(show_spinner=False)
+def find_terminal() -> Optional[str]:
+    """First installed terminal from _TERMINAL_ARGV; PATH is probed once per server process, not per rerun."""
+    return next((t for t in _TERMINAL_ARGV if shutil.which(t)), None)
+
 def try_open_in_terminal(cmd: str) -> Optional[subprocess.Popen]:
     """
     Try to open a new terminal window and run cmd inside it.
     Returns the Popen object if successful, else None.
     """
+    import subprocess
     try:
         if sys.platform == "win32":
             # start a new cmd window and run the command; keep it open (/k)
@@ -42,19 +103,9 @@ def try_open_in_terminal(cmd: str) -> Optional[subprocess.Popen]:
             # macOS: use osascript to open Terminal and run command
             osa = f'''osascript -e 'tell application "Terminal" to do script "{cmd}"' '''
             return subprocess.Popen(osa, shell=True)
-        else:
-            # common Linux desktop terminal emulators
-            terminals = [
-                ["x-terminal-emulator", "-e", cmd],
-                ["gnome-terminal", "--", "bash", "-lc", f"{cmd}; exec bash"],
-                ["konsole", "-e", f"{cmd}; bash"],
-                ["xterm", "-e", f"{cmd}; bash"]
-            ]
-            for t in terminals:
-                try:
-                    return subprocess.Popen(t)
-                except Exception:
-                    continue
+        elif (terminal := find_terminal()):
+            # first available Linux desktop terminal emulator
+            return subprocess.Popen(_TERMINAL_ARGV[terminal](cmd))
     except Exception:
         pass
     return None
@@ -64,14 +115,21 @@ def start_agent_process(path: Path, use_streamlit: bool = False) -> Dict:
     Start the agent file as a separate process. Tries to open a new terminal window first.
     If that fails, it starts a detached background process and returns details.
     """
+    # imported here: only needed once the user actually clicks Run
+    import shlex
+    import subprocess
+
     python_exe = sys.executable or "python"
+    # argv for direct launches; cmd is the shell string run inside a terminal window
     if use_streamlit:
+        argv = [python_exe, "-m", "streamlit", "run", str(path)]
         if os.name == "nt":  # Windows
             cmd = f'python -m streamlit run "{str(path)}"'
         else:  # POSIX (Linux/Mac)
             cmd = f"python3 -m streamlit run {shlex.quote(str(path))}"
 
     else:
+        argv = [python_exe, str(path)]
         cmd = f"{shlex.quote(python_exe)} {shlex.quote(str(path))}"
 
     # Try opening in a new terminal window
@@ -79,21 +137,33 @@ def start_agent_process(path: Path, use_streamlit: bool = False) -> Dict:
     if p:
         return {"pid": getattr(p, "pid", None), "proc": p, "cmd": cmd, "terminal": True}
 
-    # Fallback: start a detached background process
+    # Fallback: fork a detached background process from the warm launcher
+    if LAUNCHER_SOCKET and os.path.exists(LAUNCHER_SOCKET):
+        try:
+            # the launcher already runs Python, so it takes the argv without the interpreter
+            pid = agent_launcher.launch(LAUNCHER_SOCKET, ["streamlit", "run", str(path)] if use_streamlit else [str(path)])
+            return {"pid": pid, "proc": None, "cmd": cmd, "terminal": False}
+        except Exception:
+            pass  # launcher not reachable: cold-start the process below
+
+    # Otherwise start a detached background process directly
     try:
-        # On POSIX, use setsid to detach
+        # On POSIX, detach into a new session (setsid in the child without a preexec_fn,
+        # which keeps subprocess on its fast spawn path)
         if os.name == "posix":
-            p = subprocess.Popen(shlex.split(cmd), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, preexec_fn=os.setsid)
+            p = subprocess.Popen(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
         else:
             # On Windows, CREATE_NEW_PROCESS_GROUP to detach
             CREATE_NEW_PROCESS_GROUP = 0x00000200
-            p = subprocess.Popen(shlex.split(cmd), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, creationflags=CREATE_NEW_PROCESS_GROUP)
+            p = subprocess.Popen(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, creationflags=CREATE_NEW_PROCESS_GROUP)
         return {"pid": getattr(p, "pid", None), "proc": p, "cmd": cmd, "terminal": False}
     except Exception as e:
         return {"pid": None, "proc": None, "cmd": cmd, "terminal": False, "error": str(e)}
 
 def stop_agent_process(entry: dict) -> bool:
     """Attempt to stop a running process entry created by start_agent_process."""
+    import signal
+
     p: Optional[subprocess.Popen] = entry.get("proc")
     pid = entry.get("pid")
     try:
@@ -124,7 +194,7 @@ def stop_agent_process(entry: dict) -> bool:
     return False
 
 # List agent files
-agents = sorted([p for p in AGENTS_DIR.glob("*.py") if p.is_file()])
+agents = list_agents(AGENTS_DIR)
 
 if not agents:
     st.info("No agents found in `./agents/`. Generate an agent in the Agent Builder first.")
@@ -139,12 +209,12 @@ else:
                 st.code(human_preview(path), language="python")
                 if st.checkbox(f"Show full file `{path.name}`", key=f"show_full_{name}"):
                     try:
-                        st.text_area("Full file contents", value=path.read_text(encoding="utf-8"), height=300, key=f"full_{name}")
+                        st.text_area("Full file contents", value=read_full(path), height=300, key=f"full_{name}")
                     except Exception as e:
                         st.error(f"Error reading file: {e}")
             with col2:
                 # show run controls
-                running = name in st.session_state.agent_processes and st.session_state.agent_processes[name].get("pid")
+                running = _alive(st.session_state.agent_processes.get(name, {}))
                 st.markdown("**Run controls**")
                 use_streamlit = st.checkbox("Run with `streamlit run`", value=False, key=f"streamlit_run_{name}")
                 run_btn = st.button("▶️ Run", key=f"run_{name}")
@@ -181,8 +251,10 @@ else:
                 if name in st.session_state.agent_processes:
                     entry = st.session_state.agent_processes[name]
                     pid = entry.get("pid")
-                    if pid:
-                        st.info(f"Running — PID: {pid} ({'terminal' if entry.get('terminal') else 'background'})")
+                    if entry.get("terminal"):
+                        st.info("Launched in a terminal window — close the window (or click Stop) to end it")
+                    elif pid:
+                        st.info(f"Running — PID: {pid} (background)")
                     else:
                         st.info("Running — process started (no PID available)")
                 else:
@@ -0,0 +1,59 @@
+from __future__ import annotations
+import os
+from pathlib import Path
+import streamlit as st
+
+
+@st.cache_data(show_spinner=False)
+def _list_agent_names(directory: str, dir_mtime_ns: int) -> list[str]:
+    # dir_mtime_ns is only part of the cache key: adding, removing or renaming a file changes it
+    # scandir's DirEntry carries the file type from readdir, so only symlinks (followed, as
+    # Path.is_file() did) cost a stat
+    with os.scandir(directory) as it:
+        return sorted(
+            e.name for e in it
+            if e.name.endswith(".py") and e.is_file()
+        )
+
+
+def list_agents(directory: Path) -> list[Path]:
+    """*.py files in directory sorted by name; the directory is re-listed only when it changes."""
+    names = _list_agent_names(str(directory), directory.stat().st_mtime_ns)
+    return [directory / name for name in names]
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _read_preview(path: str, mtime_ns: int, size: int, max_chars: int) -> str:
+    # max_chars characters take at most 4 * max_chars bytes in UTF-8, so never read more than that
+    with open(path, "rb") as f:
+        head = f.read(max_chars * 4)
+    text = head.decode("utf-8", errors="replace")
+    truncated = len(text) > max_chars or size > len(head)
+    return text[:max_chars] + ("...\n(Preview truncated)" if truncated else "")
+
+
+def read_preview(path: Path, max_chars: int) -> str:
+    """First max_chars of an agent file, cached until the file's mtime or size changes."""
+    stat = path.stat()
+    return _read_preview(str(path), stat.st_mtime_ns, stat.st_size, max_chars)
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _read_full(path: str, mtime_ns: int, size: int) -> str:
+    return Path(path).read_text(encoding="utf-8")
+
+
+def read_full(path: Path) -> str:
+    """Whole agent file, cached until its mtime or size changes."""
+    stat = path.stat()
+    return _read_full(str(path), stat.st_mtime_ns, stat.st_size)
+
+
+def write_text_atomic(path: str | Path, text: str) -> None:
+    """Write text via a temp file + os.replace, so readers never see a partial file.
+    No fsync: generated files only need to be visible to the next reader (e.g. `streamlit run`),
+    not to survive a power loss."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
@@ -0,0 +1,121 @@
+"""Warm launcher for MarketPlace agents (POSIX only).
+
+A long-lived process that has already imported streamlit (and google.genai) and
+forks a child per launch request, so agents skip the interpreter and import
+cold start. Requests arrive over a UNIX socket, one JSON line per connection:
+
+    {"argv": ["streamlit", "run", "/path/agent.py"]}   or   {"argv": ["/path/agent.py"]}
+
+and are answered with {"pid": <child pid>} or {"error": "..."}.
+
+    python utils/agent_launcher.py <socket path> <parent pid>
+
+The socket path should live in a private directory (tempfile.mkdtemp(), mode 0700) so
+other local users cannot connect to it; the directory is removed on exit if empty.
+"""
+from __future__ import annotations
+import json
+import os
+import socket
+import sys
+
+PRELOAD_MODULES = ("streamlit", "streamlit.web.cli", "google.genai")
+PARENT_CHECK_SECONDS = 5.0
+
+
+def _preload():
+    for name in PRELOAD_MODULES:
+        try:
+            __import__(name)
+        except Exception:
+            pass  # the child imports it itself if it needs it
+
+
+def _run_child(argv: list[str]):
+    """Runs in the forked child: detach, then run the agent in this (already warm) interpreter."""
+    import runpy
+    import signal
+    os.setsid()
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    code = 0
+    try:
+        sys.argv = argv
+        # sys.path[0] is this launcher's directory; replace it with what a cold start would use
+        if argv[0] == "streamlit":
+            sys.path[0] = os.getcwd()  # as `python -m streamlit run`
+            from streamlit.web import cli as stcli
+            stcli.main()
+        else:
+            sys.path[0] = os.path.dirname(os.path.abspath(argv[0]))  # as `python script.py`
+            runpy.run_path(argv[0], run_name="__main__")
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else 0
+    except BaseException:
+        code = 1
+    os._exit(code)
+
+
+def serve(socket_path: str, parent_pid: int):
+    # imported here, not at module level: pages import this module only for launch()
+    import signal
+    _preload()
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)  # children are reaped automatically
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # unwind so the socket file is removed
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen()
+    server.settimeout(PARENT_CHECK_SECONDS)
+
+    try:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                if os.getppid() != parent_pid:  # the Streamlit server is gone
+                    return
+                continue
+            with conn:
+                try:
+                    request = json.loads(conn.makefile("rb").readline())
+                    argv = [str(a) for a in request["argv"]]
+                    pid = os.fork()
+                    if pid == 0:
+                        server.close()
+                        conn.close()
+                        _run_child(argv)
+                    reply = {"pid": pid}
+                except Exception as e:
+                    reply = {"error": str(e)}
+                conn.sendall(json.dumps(reply).encode("utf-8") + b"\n")
+    finally:
+        server.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        try:
+            os.rmdir(os.path.dirname(socket_path))
+        except OSError:
+            pass  # not empty (or not ours to remove)
+
+
+def launch(socket_path: str, argv: list[str], timeout: float = 5.0) -> int:
+    """Ask the launcher at socket_path to start argv; returns the child's pid."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(timeout)
+        s.connect(socket_path)
+        s.sendall(json.dumps({"argv": argv}).encode("utf-8") + b"\n")
+        reply = json.loads(s.makefile("rb").readline())
+    if "error" in reply:
+        raise RuntimeError(reply["error"])
+    return reply["pid"]
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1], int(sys.argv[2]))
@@ -0,0 +1,40 @@
+"""Offline conversion of a chunks JSON list into a UTF-8 blob plus an offsets array.
+
+    python utils/build_chunk_store.py zomato_support_chunks.json
+
+writes zomato_support_chunks.bin and zomato_support_chunks.offsets.npy next to
+the JSON file. Chunk i is blob[offsets[i]:offsets[i + 1]].decode("utf-8").
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import numpy as np
+
+
+def build_chunk_store(chunks_path: str):
+    with open(chunks_path, "rb") as f:
+        chunks = json.loads(f.read())
+
+    encoded = [c.encode("utf-8") for c in chunks]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+
+    base = os.path.splitext(chunks_path)[0]
+    with open(base + ".bin", "wb") as f:
+        f.write(b"".join(encoded))
+    np.save(base + ".offsets.npy", offsets)
+    return base + ".bin", base + ".offsets.npy"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a chunks JSON file into a blob + offsets store.")
+    parser.add_argument("chunks", help="chunks JSON file, e.g. zomato_support_chunks.json")
+    args = parser.parse_args()
+
+    blob_path, offsets_path = build_chunk_store(args.chunks)
+    print(f"Wrote {blob_path} and {offsets_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+
+class _SafeFilenameTable(dict):
+    """str.translate table: keeps ASCII letters, digits, '_' and '-', maps every other
+    code point to '_' (entries are filled in on first lookup)."""
+
+    def __missing__(self, c: int) -> int:
+        ch = chr(c)
+        self[c] = c if ch.isascii() and (ch.isalnum() or ch in "_-") else ord("_")
+        return self[c]
+
+
+_SAFE_TABLE = _SafeFilenameTable()
+
+
+def sanitize_filename(name: str, default: str = "agent") -> str:
+    """Replace every character outside [A-Za-z0-9_-] with '_'; empty names become default."""
+    return (name or "").strip().translate(_SAFE_TABLE) or default
@@ -1,7 +1,28 @@
 from __future__ import annotations
 import os
 import streamlit as st
-from google import genai
+
+HTTP_TIMEOUT_MS = 120_000
+
+
+def _api_key() -> str:
+    try:
+        key = st.secrets.get("GEMINI_API_KEY")
+    except Exception:  # no secrets.toml
+        key = None
+    return key or os.environ.get("GEMINI_API_KEY", "")
+
+
+@st.cache_resource(show_spinner=False)
+def _get_client():
+    # Built once per process: the key is looked up here and the client (and its
+    # HTTP connection pool) is shared across reruns and sessions. google.genai is
+    # imported here so pages that never call Gemini don't pay for it.
+    from google import genai
+    from google.genai import types
+
+    return genai.Client(api_key=_api_key(), http_options=types.HttpOptions(timeout=HTTP_TIMEOUT_MS))
+
 
 def setup_gemini():
     """Return a configured Google Gemini client.
@@ -9,7 +30,7 @@ def setup_gemini():
     Shows a friendly error if missing.
     """
     try:
-        return genai.Client(api_key="")
+        return _get_client()
     except Exception as e:
         st.error(f"Failed to initialize Gemini client: {e}")
         st.stop()
@@ -0,0 +1,89 @@
+from __future__ import annotations
+import hashlib
+import time
+from typing import Callable, Iterator, Optional
+
+try:
+    import diskcache
+    _cache = diskcache.Cache(".llm_cache")
+except ImportError:  # diskcache not installed: cache for the lifetime of the process only
+    diskcache = None
+    _cache = {}  # key -> (text, expires_at or None)
+
+
+def _cache_key(model: str, prompt: str, config=None) -> str:
+    raw = model + "\x00" + prompt
+    if config is not None:
+        raw += "\x00" + repr(config)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _get(key: str) -> Optional[str]:
+    if diskcache is not None:
+        return _cache.get(key)  # diskcache drops expired entries itself
+    entry = _cache.get(key)
+    if entry is None:
+        return None
+    text, expires_at = entry
+    if expires_at is not None and expires_at <= time.time():
+        _cache.pop(key, None)
+        return None
+    return text
+
+
+def _set(key: str, text: str, expire: Optional[float]) -> None:
+    if diskcache is not None:
+        _cache.set(key, text, expire=expire)
+    else:
+        _cache[key] = (text, None if expire is None else time.time() + expire)
+
+
+def cached_text(model: str, prompt: str, generate: Callable[[], str], config=None,
+                expire: Optional[float] = None, refresh: bool = False) -> str:
+    """Return the cached response text for (model, prompt, config), calling generate() on a miss.
+    expire is the entry's lifetime in seconds (None: no expiry); refresh=True skips the lookup
+    and replaces the cached entry. Empty responses are not cached so a failed generation can be retried.
+    """
+    key = _cache_key(model, prompt, config)
+    text = None if refresh else _get(key)
+    if text is not None:
+        return text
+    text = generate()
+    if text:
+        _set(key, text, expire)
+    return text
+
+
+def cached_generate(client, model: str, prompt: str, config=None,
+                    expire: Optional[float] = None, refresh: bool = False) -> str:
+    """Cached wrapper around `client.models.generate_content(...).text` for google.genai clients."""
+    def generate() -> str:
+        kwargs = {"model": model, "contents": prompt}
+        if config is not None:
+            kwargs["config"] = config
+        return client.models.generate_content(**kwargs).text or ""
+    return cached_text(model, prompt, generate, config, expire=expire, refresh=refresh)
+
+
+def cached_generate_stream(client, model: str, prompt: str, config=None,
+                           expire: Optional[float] = None, refresh: bool = False) -> Iterator[str]:
+    """Streaming counterpart of cached_generate: yields text chunks from
+    `client.models.generate_content_stream`, or the whole cached text at once on a hit.
+    The full text is cached only after the stream completes.
+    """
+    key = _cache_key(model, prompt, config)
+    text = None if refresh else _get(key)
+    if text is not None:
+        yield text
+        return
+    kwargs = {"model": model, "contents": prompt}
+    if config is not None:
+        kwargs["config"] = config
+    parts = []
+    for chunk in client.models.generate_content_stream(**kwargs):
+        if chunk.text:
+            parts.append(chunk.text)
+            yield chunk.text
+    text = "".join(parts)
+    if text:
+        _set(key, text, expire)
@@ -0,0 +1,42 @@
+"""Offline rebuild of a flat FAISS index into a compressed IVF-PQ index.
+
+    python utils/rebuild_faiss_index.py zomato_support.faiss zomato_support_ivfpq.faiss
+
+Vectors are read back from the existing (flat) index, so the chunk order and
+ids stay the same and the chunks JSON does not need to be regenerated.
+"""
+from __future__ import annotations
+import argparse
+import faiss
+
+DEFAULT_FACTORY = "IVF100,PQ32"
+DEFAULT_NPROBE = 10
+
+
+def rebuild_index(src_path: str, dst_path: str, factory: str = DEFAULT_FACTORY, nprobe: int = DEFAULT_NPROBE):
+    flat = faiss.read_index(src_path)
+    xb = flat.reconstruct_n(0, flat.ntotal)
+
+    index = faiss.index_factory(flat.d, factory, faiss.METRIC_INNER_PRODUCT)
+    index.train(xb)
+    index.add(xb)
+    # nprobe is stored with the index, so readers get it without extra code
+    faiss.extract_index_ivf(index).nprobe = nprobe
+    faiss.write_index(index, dst_path)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild a flat FAISS index as IVF-PQ.")
+    parser.add_argument("src", help="existing flat index, e.g. zomato_support.faiss")
+    parser.add_argument("dst", help="output path, e.g. zomato_support_ivfpq.faiss")
+    parser.add_argument("--factory", default=DEFAULT_FACTORY, help=f"faiss.index_factory string (default: {DEFAULT_FACTORY})")
+    parser.add_argument("--nprobe", type=int, default=DEFAULT_NPROBE, help=f"IVF lists scanned per query (default: {DEFAULT_NPROBE})")
+    args = parser.parse_args()
+
+    index = rebuild_index(args.src, args.dst, args.factory, args.nprobe)
+    print(f"Wrote {index.ntotal} vectors ({args.factory}, nprobe={args.nprobe}) to {args.dst}")
+
+
+if __name__ == "__main__":
+    main()